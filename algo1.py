@@ -1,10 +1,14 @@
+import asyncio
+import os
 import signal
-import requests
-from time import sleep
+from contextlib import contextmanager
 
-# this class definition allows us to print error messages and stop the program when needed
-class ApiException(Exception):
-    pass
+from fills import FillTracker
+from liquidation import Liquidator
+from metrics import METRICS, InstrumentedSession, log
+from rit_async import AsyncRIT, pooled_session
+from scanner import fetch_books, load_config, plan_trades
+from scheduler import Scheduler
 
 # this signal handler allows for a graceful shutdown when CTRL+C is pressed
 def signal_handler(signum, frame):
@@ -13,98 +17,142 @@ def signal_handler(signum, frame):
     shutdown = True
 
 # Constants
-API_KEY = {'X-API-Key': 'II679A88'}
 shutdown = False
 MAX_POSITION_LIMIT = 25000  # Maximum position limit
 MAX_ORDER_SIZE = 6000  # Maximum size of each order
-realized_profit_loss = 0  # Track realized P&L
-position_m = 0  # Track position on main exchange
-position_a = 0  # Track position on alternate exchange
+ARBITRAGE_PAIRS = {'CRZY': ['CRZY_M', 'CRZY_A']}  # Underlying -> tickers it is cross-listed under
+CONFIG_FILE = 'arbitrage.json'  # Optional file overriding ARBITRAGE_PAIRS
+LIQUIDATION_TICK = 285  # Tick from which arbitrage stops and both legs are flattened
 print("Stocks")
 
-# this helper method returns the current 'tick' of the running case
-def get_tick(session):
-    resp = session.get('http://localhost:9999/v1/case')
-    if resp.ok:
-        case = resp.json()
-        return case['tick']
-    raise ApiException('The API key provided in this Python code must match that in the RIT client (please refer to the API hyperlink in the client toolbar and/or the RIT – User Guide – REST API Documentation.pdf)')
-
-# this helper method returns the bid and ask for a given security
-def ticker_bid_ask(session, ticker):
-    payload = {'ticker': ticker}
-    resp = session.get('http://localhost:9999/v1/securities/book', params=payload)
-    if resp.ok:
-        book = resp.json()
-        best_bid = book['bids'][0]['price'] if book['bids'] else None
-        best_ask = book['asks'][0]['price'] if book['asks'] else None
-        return best_bid, best_ask
-    raise ApiException(f'Error fetching bid/ask for ticker {ticker}')
-
-# Helper method to submit an order
-def submit_order(session, ticker, action, quantity, order_type='MARKET'):
-    order_data = {
-        'ticker': ticker,
-        'type': order_type,  # Use 'MARKET' or 'LIMIT'
-        'action': action.upper(),  # "BUY" or "SELL"
-        'quantity': quantity
-    }
-    resp = session.post('http://localhost:9999/v1/orders', params=order_data)
-    if resp.ok:
-        print(f"Successfully submitted {action} order for {quantity} shares of {ticker}.")
-    else:
-        print(f"Error submitting order: {resp.text}")
+# this helper method returns the current tick and the full books of every configured ticker, all taken at the same moment
+async def snapshot(client, pairs=ARBITRAGE_PAIRS):
+    return await asyncio.gather(client.get_tick(), fetch_books(client, pairs))
+
+# Helper method to submit both legs of an arbitrage at once as LIMIT orders.
+# Any unfilled remainder is cancelled so no leg is left resting; returns the final order of each leg (None if rejected)
+async def submit_pair(client, buy_ticker, sell_ticker, quantity, buy_limit, sell_limit):
+    legs = [(buy_ticker, 'buy', quantity, 'LIMIT', buy_limit), (sell_ticker, 'sell', quantity, 'LIMIT', sell_limit)]
+    responses = await client.submit_orders(legs)
+    orders = []
+    for (ticker, action, _, _, price), resp in zip(legs, responses):
+        if resp.ok:
+            log.info('order_submitted', ticker=ticker, action=action, quantity=quantity, price=price)
+            orders.append(resp.json())
+        else:
+            log.error('order_rejected', ticker=ticker, action=action, quantity=quantity, error=resp.text)
+            orders.append(None)
+    resting = [order for order in orders if order is not None and order['status'] == 'OPEN']
+    if resting:
+        await asyncio.gather(*(client.cancel_order(order['order_id']) for order in resting))
+        final = await asyncio.gather(*(client.get_order(order['order_id']) for order in resting))
+        final = {order['order_id']: order for order in final}
+        orders = [final.get(order['order_id'], order) if order is not None else None for order in orders]
+    return orders
+
+# Helper method to unwind the part of a leg the other leg did not match, at MARKET on that leg's own venue.
+# Returns the P&L of the unwind against the leg's fill price; anything left unfilled stays in the tracker's
+# positions and so keeps counting against the shared position limit
+async def unwind_excess(client, fills, order, excess):
+    ticker, action = order['ticker'], 'sell' if excess > 0 else 'buy'
+    resp = await client.submit_order(ticker, action, abs(excess))
+    if not resp.ok:
+        log.error('leg_imbalance_unhedged', ticker=ticker, action=action, quantity=abs(excess), error=resp.text)
+        return 0.0
+    hedge = resp.json()
+    fills.on_order(hedge)
+    filled = hedge.get('quantity_filled', 0)
+    pnl = filled * (hedge['vwap'] - order['vwap']) * (1 if excess > 0 else -1) if filled else 0.0
+    log.warning('leg_imbalance_hedged', ticker=ticker, action=action, quantity=abs(excess), filled=filled, pnl=pnl)
+    return pnl
+
+# this method executes one leg pair and books its actual fills into the account's tracker
+async def execute(client, account, plan):
+    buy_ticker, sell_ticker = plan['buy_ticker'], plan['sell_ticker']
+    buy, sell = await submit_pair(client, buy_ticker, sell_ticker, plan['quantity'],
+                                  plan['buy_limit'], plan['sell_limit'])
+    fills = account['fills']
+    for order in (buy, sell):
+        if order is not None:
+            fills.on_order(order)
+    bought = buy['quantity_filled'] if buy else 0
+    sold = sell['quantity_filled'] if sell else 0
+
+    # Realized P&L comes from the actual fill prices of the matched quantity
+    matched = min(bought, sold)
+    realized = matched * (sell['vwap'] - buy['vwap']) if matched else 0.0
+    # One leg filling more than the other would leave a naked position; unwind the excess right away
+    if bought != sold:
+        realized += await unwind_excess(client, fills, buy if bought > sold else sell, bought - sold)
+    account['expected_profit_loss'] += plan['expected_pnl']
+    log.info('arbitrage_executed', buy=buy_ticker, sell=sell_ticker, quantity=plan['quantity'],
+             bought=bought, sold=sold, buy_limit=plan['buy_limit'], sell_limit=plan['sell_limit'],
+             expected_pnl=plan['expected_pnl'], realized_pnl=realized)
+
+# this method trades one snapshot of the tick and all books; account tracks positions and P&L
+async def trade(client, account, tick, books, pairs=ARBITRAGE_PAIRS,
+                max_order_size=MAX_ORDER_SIZE, max_position_limit=MAX_POSITION_LIMIT):
+    # Every underlying's net position draws on one shared limit
+    fills = account['fills']
+    exposure = sum(abs(sum(fills.position(ticker) for ticker in venues)) for venues in pairs.values())
+    plans = plan_trades(pairs, books, max_position_limit - exposure, max_order_size)
+
+    # The largest opportunities are sized first; all selected pairs go out together
+    if plans:
+        METRICS.decision()
+        await asyncio.gather(*(execute(client, account, plan) for plan in plans))
+
+    # Log current position and P&L, marking every venue at its mid
+    for ticker, book in books.items():
+        if book['bids'] and book['asks']:
+            fills.mark(ticker, (book['bids'][0]['price'] + book['asks'][0]['price']) / 2)
+    realized, unrealized = fills.pnl()
+    log.debug('position', tick=tick, positions={ticker: book.position for ticker, book in fills.books.items()},
+              expected_profit_loss=account['expected_profit_loss'],
+              realized_profit_loss=realized, unrealized_profit_loss=unrealized)
+
+# this context manager sets the strategy up on a session and yields its (watchers, step, done) triple
+@contextmanager
+def strategy(session, portfolio=None, pairs=ARBITRAGE_PAIRS, max_order_size=MAX_ORDER_SIZE,
+             max_position_limit=MAX_POSITION_LIMIT, liquidation_tick=LIQUIDATION_TICK):
+    loop = asyncio.new_event_loop()
+    client = AsyncRIT(session)
+    fills = FillTracker(session, portfolio)
+    account = {'fills': fills, 'expected_profit_loss': 0.0}
+    tickers = [ticker for venues in pairs.values() for ticker in venues]
+    liquidator = Liquidator(session, tickers, liquidation_tick, portfolio=fills)
+
+    # The tick and every configured book are the inputs; trade only when one of them changes
+    watchers = {'snapshot': lambda: loop.run_until_complete(snapshot(client, pairs))}
+
+    def step(state):
+        tick, books = state['snapshot']
+        if liquidator.active(tick):
+            # Near the session end the legs are worked down to flat, reusing the books just fetched;
+            # children left resting last tick are polled first so their fills are counted
+            fills.poll_orders()
+            liquidator.step(tick, books)
+            return
+        loop.run_until_complete(trade(client, account, tick, books, pairs, max_order_size, max_position_limit))
+
+    def done(state):
+        # Keep trading while the algorithm is still within trading time, then until flat
+        return not 5 < state['snapshot'][0] < 300 or liquidator.flat or shutdown
+
+    try:
+        yield watchers, step, done
+    finally:
+        client.close()
+        loop.close()
 
 def main():
-    global realized_profit_loss, position_m, position_a
-    with requests.Session() as s:
-        s.headers.update(API_KEY)
-        tick = get_tick(s)
-        
-        # Trading loop
-        while tick > 5 and tick < 295 and not shutdown:
-            # Fetch bid/ask for both tickers
-            crzy_m_bid, crzy_m_ask = ticker_bid_ask(s, 'CRZY_M')
-            crzy_a_bid, crzy_a_ask = ticker_bid_ask(s, 'CRZY_A')
-
-            # Check if an arbitrage opportunity exists in either direction
-            if crzy_m_ask is not None and crzy_a_bid is not None and crzy_m_ask < crzy_a_bid:
-                # Buy on CRZY_M and sell on CRZY_A
-                order_size = min(MAX_ORDER_SIZE, MAX_POSITION_LIMIT - abs(position_m + position_a))
-                if order_size > 0:
-                    submit_order(s, 'CRZY_M', 'buy', order_size)
-                    submit_order(s, 'CRZY_A', 'sell', order_size)
-                     
-                    position_m += order_size
-                    position_a -= order_size
-                    realized_profit_loss += (crzy_a_bid - crzy_m_ask) * order_size
-                    print(f"Executed arbitrage trade: Buy CRZY_M @ {crzy_m_ask}, Sell CRZY_A @ {crzy_a_bid}")
-
-            if crzy_a_ask is not None and crzy_m_bid is not None and crzy_a_ask < crzy_m_bid:
-                # Buy on CRZY_A and sell on CRZY_M
-                order_size = min(MAX_ORDER_SIZE, MAX_POSITION_LIMIT - abs(position_m + position_a))
-                if order_size > 0:
-                    submit_order(s, 'CRZY_A', 'buy', order_size)
-                    submit_order(s, 'CRZY_M', 'sell', order_size)
-                    position_a += order_size
-                    position_m -= order_size
-                    realized_profit_loss += (crzy_m_bid - crzy_a_ask) * order_size
-                    print(f"Executed arbitrage trade: Buy CRZY_A @ {crzy_a_ask}, Sell CRZY_M @ {crzy_m_bid}")
-
-            # Print current position and P&L
-            print(f"Current position - Main: {position_m}, Alternate: {position_a}")
-            print(f"Realized P&L: {realized_profit_loss}")
-
-            # Check if we are exceeding the position limits
-            # if abs(position_m) > MAX_POSITION_LIMIT or abs(position_a) > MAX_POSITION_LIMIT:
-            #     print("Position limit exceeded. Stopping trading.")
-            #     break
-
-            # Sleep briefly to avoid overwhelming the API with too many requests
-            sleep(1)
-
-            # Update the tick to ensure the algorithm is still within trading time
-            tick = get_tick(s)
+    pairs = load_config(CONFIG_FILE) if os.path.exists(CONFIG_FILE) else ARBITRAGE_PAIRS
+    METRICS.start_exporter()
+    try:
+        with strategy(pooled_session(session=InstrumentedSession()), pairs=pairs) as (watchers, step, done):
+            Scheduler(watchers, metrics=METRICS).run(step, stop=done)
+    finally:
+        METRICS.export()
 
 if __name__ == '__main__':
     # Register the custom signal handler for graceful shutdowns
@@ -0,0 +1,99 @@
+import argparse
+import contextlib
+import importlib
+import os
+import time
+
+from metrics import log
+from mock_rit import MockRIT, SimSession, load_case, synthetic_case
+from portfolio import PortfolioState
+
+STRATEGIES = ('algo1', 'algo2', 'news')
+
+
+def max_drawdown(equity):
+    """Largest peak-to-trough drop of an equity curve."""
+    peak, drawdown = float('-inf'), 0.0
+    for value in equity:
+        peak = max(peak, value)
+        drawdown = max(drawdown, peak - value)
+    return drawdown
+
+
+def check_positions(portfolio, market):
+    """Raise if the cached positions disagree with the market's."""
+    mismatched = {ticker: (portfolio.position(ticker), position) for ticker, position in market.positions.items()
+                  if portfolio.position(ticker) != position}
+    if mismatched:
+        raise Exception(f"Cached positions differ from the market at tick {market.tick}: {mismatched}")
+
+
+def run_case(name, case=None, params=None, quiet=True, check=False, **market_options):
+    """Run one strategy over one case in-process and return its statistics.
+
+    The strategy talks to a ``MockRIT`` through a ``SimSession``, so no HTTP is
+    involved and no time is spent sleeping: each tick the market advances,
+    the portfolio is reconciled, the watchers are read and the step runs.
+    With ``check`` the cached positions must match the market after every step.
+    """
+    market = MockRIT(case, **market_options)
+    session = SimSession(market)
+    portfolio = PortfolioState(session)
+    module = importlib.import_module(name)
+    equity = []
+    with open(os.devnull, 'w') as devnull, contextlib.ExitStack() as stack:
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(devnull))
+            level = log.level
+            log.set_level('ERROR')
+            stack.callback(setattr, log, 'level', level)
+        watchers, step, done = stack.enter_context(module.strategy(session, portfolio, **(params or {})))
+        while market.tick < market.ticks:
+            portfolio.reconcile()
+            state = {key: watch() for key, watch in watchers.items()}
+            if not done(state):
+                step(state)
+                if check:
+                    check_positions(portfolio, market)
+            equity.append(market.pnl())
+            market.advance()
+    return {
+        'strategy': name,
+        'pnl': market.pnl(),
+        'max_drawdown': max_drawdown(equity),
+        'fills': len(market.fills),
+        'volume': sum(fill[4] for fill in market.fills),
+        'orders': len(market.orders),
+        'requests': session.requests,
+    }
+
+
+def run_cases(name, seeds, params=None, check=False, **market_options):
+    """Run a strategy over one synthetic case per seed."""
+    return [run_case(name, synthetic_case(seed), params, check=check, **market_options) for seed in seeds]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest a strategy against the mock RIT market.")
+    parser.add_argument('strategy', choices=STRATEGIES)
+    parser.add_argument('--cases', type=int, default=10, help="number of synthetic cases to run")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first synthetic case")
+    parser.add_argument('--case', help="replay a recorded case file instead of synthetic ones")
+    parser.add_argument('--check', action='store_true', help="fail if cached positions ever differ from the market")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.case:
+        results = [run_case(args.strategy, load_case(args.case), check=args.check)]
+    else:
+        results = run_cases(args.strategy, range(args.seed, args.seed + args.cases), check=args.check)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        print(f"P&L {result['pnl']:12.2f}  drawdown {result['max_drawdown']:10.2f}  "
+              f"fills {result['fills']:5d}  orders {result['orders']:5d}  requests {result['requests']:6d}")
+    print(f"{len(results)} cases in {elapsed:.2f}s ({len(results) / elapsed * 60:.0f} cases/min)")
+
+
+if __name__ == '__main__':
+    main()
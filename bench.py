@@ -0,0 +1,321 @@
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import timeit
+
+import pandas as pd
+import requests
+
+import algo1
+from depth import plan_arbitrage
+from fair_value import FairValueEngine
+from indicators import IndicatorEngine
+from metrics import log
+from mock_rit import MockRIT, SimSession, serve, synthetic_case
+from news import ETF_WEIGHTS, process_news_item
+from portfolio import PortfolioState
+from rit_async import AsyncRIT
+from rit_config import API_KEY
+from scanner import top_of_book
+
+# Number of detect-to-fill cycles measured per variant
+ITERATIONS = 200
+
+STRATEGIES = ('algo1', 'algo2', 'news')
+SUITES = ('loops', 'micro', 'network')
+SEED = 0  # Synthetic case every strategy benchmark replays
+MICRO_REPEAT = 7  # Timing runs per microbenchmark; the fastest one is kept
+REPEATS = 5  # Full runs of the selected suites; the gate compares their medians
+THRESHOLD = 0.25  # Relative change beyond which a result counts as a regression
+# Wider thresholds for the noisy metrics: microsecond timings and tail latencies
+METRIC_THRESHOLDS = {'us_per_call': 0.5, 'p99_ms': 1.0}
+RIT_PORT = 9999  # Port rit_config.API_URL points at
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples`` (nearest rank)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(name, samples):
+    """Print a one-line latency summary in milliseconds."""
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<28} p50={percentile(ms, 50):7.2f}ms  p99={percentile(ms, 99):7.2f}ms  "
+          f"mean={statistics.mean(ms):7.2f}ms")
+
+
+def latency_results(samples):
+    ms = [s * 1000 for s in samples]
+    return {'p50_ms': percentile(ms, 50), 'p99_ms': percentile(ms, 99)}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence prints and anything below ERROR in the structured log."""
+    level = log.level
+    log.set_level('ERROR')
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        log.level = level
+
+
+# Detect-to-fill over HTTP
+
+def bench_algo1_serial(api_url, iterations=ITERATIONS):
+    """Time the original pattern: two books, the tick, then each leg, one after another."""
+    samples = []
+    with requests.Session() as s:
+        s.headers.update(API_KEY)
+        for _ in range(iterations):
+            start = time.perf_counter()
+            s.get(f'{api_url}/securities/book', params={'ticker': 'CRZY_M'})
+            s.get(f'{api_url}/securities/book', params={'ticker': 'CRZY_A'})
+            s.get(f'{api_url}/case')
+            s.post(f'{api_url}/orders', params={'ticker': 'CRZY_M', 'type': 'MARKET', 'action': 'BUY', 'quantity': 100})
+            s.post(f'{api_url}/orders', params={'ticker': 'CRZY_A', 'type': 'MARKET', 'action': 'SELL', 'quantity': 100})
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def _bench_algo1_async(api_url, iterations):
+    samples = []
+    async with AsyncRIT(api_url=api_url) as client:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await algo1.snapshot(client)
+            await client.submit_orders([('CRZY_M', 'buy', 100), ('CRZY_A', 'sell', 100)])
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_algo1_async(api_url, iterations=ITERATIONS):
+    """Time the async pattern: books and tick gathered, then both legs gathered."""
+    return asyncio.run(_bench_algo1_async(api_url, iterations))
+
+
+def bench_detect_to_fill():
+    server = serve()
+    api_url = f'http://localhost:{server.server_address[1]}/v1'
+    results = {}
+    try:
+        for name, bench in (('serial', bench_algo1_serial), ('async', bench_algo1_async)):
+            samples = bench(api_url)
+            report(f'algo1 detect-to-fill {name}', samples)
+            results[f'detect_to_fill.{name}'] = latency_results(samples)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+# Strategy decision loops
+
+class CountingSession(requests.Session):
+    """``requests.Session`` with the API key set that counts its requests like ``SimSession``."""
+
+    def __init__(self):
+        super().__init__()
+        self.headers.update(API_KEY)
+        self.requests = 0
+
+    def request(self, *args, **kwargs):
+        self.requests += 1
+        return super().request(*args, **kwargs)
+
+
+def bench_strategy(name, seed=SEED, http=False):
+    """Replay one synthetic case through a strategy and time every decision-loop iteration.
+
+    An iteration is one read of the watchers plus the step, as the scheduler
+    runs it; reconciliation and the market advancing are not timed. With
+    ``http`` the strategy talks to a mock RIT server over real sockets,
+    otherwise straight to the ``MockRIT`` through a ``SimSession``.
+    """
+    market = MockRIT(synthetic_case(seed))
+    server = serve(market, port=RIT_PORT, latency=0) if http else None
+    session = CountingSession() if http else SimSession(market)
+    portfolio = PortfolioState(session)
+    samples, requests_sent = [], 0
+    try:
+        with quiet():
+            module = importlib.import_module(name)
+            with module.strategy(session, portfolio) as (watchers, step, done):
+                while market.tick < market.ticks:
+                    portfolio.reconcile()
+                    sent = session.requests
+                    start = time.perf_counter()
+                    state = {key: watch() for key, watch in watchers.items()}
+                    if not done(state):
+                        step(state)
+                        samples.append(time.perf_counter() - start)
+                        requests_sent += session.requests - sent
+                    market.advance()
+    finally:
+        session.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    elapsed = sum(samples)
+    return dict(latency_results(samples),
+                requests_per_iteration=requests_sent / len(samples),
+                orders_per_s=len(market.orders) / elapsed if elapsed else 0.0)
+
+
+def bench_strategies(strategies=STRATEGIES, http=False):
+    results = {}
+    for name in strategies:
+        result = bench_strategy(name, http=http)
+        print(f"{name + ' loop':<28} p50={result['p50_ms']:7.3f}ms  p99={result['p99_ms']:7.3f}ms  "
+              f"requests/iteration={result['requests_per_iteration']:5.2f}  orders/s={result['orders_per_s']:9.1f}")
+        results[f'loop.{name}'] = result
+    return results
+
+
+# Microbenchmarks
+
+def calculate_moving_average_and_low(prices_df, window=50):
+    """The pandas rolling-window indicators algo2 used before ``IndicatorEngine``, kept as its baseline."""
+    prices_df['moving_average'] = prices_df['close'].rolling(window=window).mean()
+    prices_df['rolling_low'] = prices_df['low'].rolling(window=window).min()
+    return prices_df['moving_average'].iloc[-1], prices_df['rolling_low'].iloc[-1]
+
+
+def time_call(fn, number):
+    """Return the fastest per-call time of ``fn`` in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=MICRO_REPEAT)) / number * 1e6
+
+
+def bench_micro():
+    case = synthetic_case(SEED)
+    market = MockRIT(case, tick=250)
+    bars = market.handle('GET', '/securities/history', {'ticker': 'ALGO', 'limit': '200'})[1][::-1]
+    prices_df = pd.DataFrame(bars)
+    books = {ticker: market.handle('GET', '/securities/book', {'ticker': ticker})[1] for ticker in ('CRZY_M', 'CRZY_A')}
+    # Cross the venues so the depth walk has an edge to size
+    books['CRZY_A'] = {'bids': [dict(level, price=level['price'] + 0.05) for level in books['CRZY_A']['bids']],
+                       'asks': books['CRZY_A']['asks']}
+    news_item = next(item for item in case['news'] if item['ticker'] == 'UB')
+    fair_value = FairValueEngine(ETF_WEIGHTS)
+
+    def indicator_step():
+        # One new bar into a warm engine, as algo2 now does each tick
+        engine.last_tick -= 1
+        engine.update(bars[-1:])
+
+    engine = IndicatorEngine(20)
+    engine.update(bars)
+    benchmarks = {
+        # Fixed pure-Python work that only measures how fast this machine is right now
+        'reference': (lambda: sum(i * i for i in range(100)), 20000),
+        'calculate_moving_average_and_low': (lambda: calculate_moving_average_and_low(prices_df, 20), 200),
+        'indicator_engine_update': (indicator_step, 20000),
+        'process_news_item': (lambda: process_news_item(fair_value, news_item), 20000),
+        'top_of_book': (lambda: top_of_book(algo1.ARBITRAGE_PAIRS, books), 20000),
+        'plan_arbitrage': (lambda: plan_arbitrage(books['CRZY_M']['asks'], books['CRZY_A']['bids']), 5000),
+    }
+    results = {}
+    for name, (fn, number) in benchmarks.items():
+        with quiet():
+            us = time_call(fn, number)
+        print(f"{name:<28} {us:10.2f}us/call")
+        results[f'micro.{name}'] = {'us_per_call': us}
+    return results
+
+
+# Regression check
+
+def median_results(runs):
+    """Merge the results of several runs into the median of every metric."""
+    merged = {}
+    for results in runs:
+        for name, metrics in results.items():
+            for metric, value in metrics.items():
+                merged.setdefault(name, {}).setdefault(metric, []).append(value)
+    return {name: {metric: statistics.median(values) for metric, values in metrics.items()}
+            for name, metrics in merged.items()}
+
+
+def regressions(results, baseline, threshold=None):
+    """List every metric that got worse than ``baseline`` by more than its threshold.
+
+    Throughputs (``*_per_s``) regress when they drop; everything else is a
+    cost and regresses when it grows. Without ``threshold`` each metric uses
+    its ``METRIC_THRESHOLDS`` entry, or ``THRESHOLD``. Microbenchmarks are
+    compared relative to ``micro.reference``, so a machine that is slower as
+    a whole does not show up as a regression.
+    """
+    found = []
+    reference, reference_before = (data.get('micro.reference', {}).get('us_per_call') for data in (results, baseline))
+    scale = reference / reference_before if reference and reference_before else 1.0
+    for name, metrics in results.items():
+        if name == 'micro.reference':
+            continue
+        for metric, value in metrics.items():
+            before = baseline.get(name, {}).get(metric)
+            if not before:
+                continue
+            if name.startswith('micro.'):
+                value /= scale
+            allowed = threshold if threshold is not None else METRIC_THRESHOLDS.get(metric, THRESHOLD)
+            change = (before - value) / before if metric.endswith('_per_s') else (value - before) / before
+            if change > allowed:
+                found.append(f"{name} {metric}: {before:.4g} -> {value:.4g} ({change:+.0%} worse)")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the strategies' decision loops against a stub RIT API.")
+    parser.add_argument('--suite', action='append', choices=SUITES, help="suite to run; repeatable (default: all)")
+    parser.add_argument('--http', action='store_true', help=f"run the strategy loops over HTTP (uses port {RIT_PORT})")
+    parser.add_argument('--save', metavar='FILE', help="write the results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='FILE', help="fail if results regress against this baseline")
+    parser.add_argument('--repeat', type=int, default=REPEATS, help="runs whose median is saved and compared")
+    parser.add_argument('--threshold', type=float,
+                        help=f"allowed relative regression for every metric (default: {THRESHOLD:.0%}, "
+                             f"wider for {', '.join(METRIC_THRESHOLDS)})")
+    args = parser.parse_args()
+    suites = args.suite or SUITES
+
+    runs = []
+    for run in range(args.repeat):
+        # Only the first run prints its results; the rest just add samples to the median
+        with quiet() if run else contextlib.nullcontext():
+            results = {}
+            if 'loops' in suites:
+                results.update(bench_strategies(http=args.http))
+            if 'micro' in suites:
+                results.update(bench_micro())
+            if 'network' in suites:
+                results.update(bench_detect_to_fill())
+        runs.append(results)
+    results = median_results(runs)
+    if args.repeat > 1:
+        print(f"Median of {args.repeat} runs:")
+        for name, metrics in sorted(results.items()):
+            print(f"{name:<40} " + '  '.join(f"{metric}={value:.4g}" for metric, value in metrics.items()))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print("No regressions beyond the thresholds")
+
+
+if __name__ == '__main__':
+    main()
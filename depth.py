@@ -0,0 +1,52 @@
+import numpy as np
+
+
+def book_side(levels):
+    """Return ``(prices, cumulative_quantity)`` arrays for one side of an order book."""
+    prices = np.fromiter((level['price'] for level in levels), dtype=np.float64, count=len(levels))
+    available = np.fromiter((level['quantity'] - level.get('quantity_filled', 0) for level in levels),
+                            dtype=np.float64, count=len(levels))
+    return prices, np.cumsum(available)
+
+
+def plan_arbitrage(asks, bids, cost_per_share=0.0, max_quantity=None):
+    """Size a buy against ``asks`` on one venue and a sell against ``bids`` on another.
+
+    Both books are walked together: between consecutive cumulative-volume
+    breakpoints the marginal share costs the ask of the level it lands in and
+    earns the bid of its level. Because asks rise and bids fall, the marginal
+    edge only shrinks, so the largest profitable quantity is the end of the
+    prefix of segments with a positive edge.
+
+    Returns a dict with ``quantity``, the ``buy_limit``/``sell_limit`` prices of
+    the deepest levels used (which cap slippage) and ``expected_pnl``; the
+    quantity is 0 when there is no edge.
+    """
+    no_trade = {'quantity': 0, 'buy_limit': None, 'sell_limit': None, 'expected_pnl': 0.0}
+    if not asks or not bids:
+        return no_trade
+    ask_prices, ask_volume = book_side(asks)
+    bid_prices, bid_volume = book_side(bids)
+
+    breakpoints = np.union1d(ask_volume, bid_volume)
+    breakpoints = breakpoints[breakpoints <= min(ask_volume[-1], bid_volume[-1])]
+    if max_quantity is not None:
+        breakpoints = np.unique(np.minimum(breakpoints, max_quantity))
+    breakpoints = breakpoints[breakpoints > 0]
+    if breakpoints.size == 0:
+        return no_trade
+
+    ask_level = np.searchsorted(ask_volume, breakpoints, side='left')
+    bid_level = np.searchsorted(bid_volume, breakpoints, side='left')
+    edge = bid_prices[bid_level] - ask_prices[ask_level] - cost_per_share
+    profitable = int(np.argmin(edge > 0)) if not edge[-1] > 0 else edge.size
+    if profitable == 0:
+        return no_trade
+
+    sizes = np.diff(breakpoints[:profitable], prepend=0.0)
+    return {
+        'quantity': int(breakpoints[profitable - 1]),
+        'buy_limit': float(ask_prices[ask_level[profitable - 1]]),
+        'sell_limit': float(bid_prices[bid_level[profitable - 1]]),
+        'expected_pnl': float(np.dot(sizes, edge[:profitable])),
+    }
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+
+CASE_LENGTH = 300  # Seconds in a case; estimates converge to the final price by then
+CONVERGENCE = 50  # Seconds for the estimate band to narrow by $1 on each side
+
+
+def calculate_range(final_estimate, elapsed_seconds):
+    """Calculate the possible price range based on elapsed time."""
+    adjustment = (CASE_LENGTH - elapsed_seconds) / CONVERGENCE
+    return final_estimate - adjustment, final_estimate + adjustment
+
+
+def load_weights(path):
+    """Load a ``{constituent ticker: shares per ETF share}`` basket from JSON."""
+    with open(path) as f:
+        return json.load(f)
+
+
+class FairValueEngine:
+    """Price intervals of every basket constituent and the ETF fair value they imply.
+
+    Each constituent's interval is the intersection of the ranges of all its
+    news so far, kept in NumPy arrays indexed by position in the basket. The
+    ETF bounds are weighted sums of those intervals. They are maintained
+    incrementally: a news item replaces its constituent's contribution, so an
+    update costs the same for two names as for two hundred.
+    """
+
+    def __init__(self, weights):
+        self.tickers = list(weights)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.weights = np.array([weights[ticker] for ticker in self.tickers], dtype=np.float64)
+        self.legs = 1 + float(np.abs(self.weights).sum())  # shares traded per ETF share arbitraged
+        self.lowest = np.full(len(self.tickers), -np.inf)
+        self.highest = np.full(len(self.tickers), np.inf)
+        self.pred = np.full(len(self.tickers), np.nan)
+        self.missing = len(self.tickers)  # constituents without any estimate yet
+        self.low = self.high = self.fair = 0.0  # ETF bounds summed over the constituents with an estimate
+
+    def _contribution(self, i):
+        weight = self.weights[i]
+        low, high = (self.lowest[i], self.highest[i]) if weight >= 0 else (self.highest[i], self.lowest[i])
+        return weight * low, weight * high, weight * self.pred[i]
+
+    def update(self, ticker, final_estimate, elapsed_seconds):
+        """Intersect ``ticker``'s interval with a new estimate and return the interval."""
+        i = self.index[ticker]
+        if np.isnan(self.pred[i]):
+            self.missing -= 1
+            old = (0.0, 0.0, 0.0)
+        else:
+            old = self._contribution(i)
+        low, high = calculate_range(final_estimate, elapsed_seconds)
+        lowest, highest = max(self.lowest[i], low), min(self.highest[i], high)
+        if lowest > highest:
+            # The news contradicts the earlier items; the newest range is the better one
+            lowest, highest = low, high
+        self.lowest[i], self.highest[i], self.pred[i] = lowest, highest, final_estimate
+        new = self._contribution(i)
+        self.low += new[0] - old[0]
+        self.high += new[1] - old[1]
+        self.fair += new[2] - old[2]
+        return lowest, highest
+
+    def interval(self, ticker):
+        """Return ``(lowest, highest)`` for ``ticker``; unbounded until its first news item."""
+        i = self.index[ticker]
+        return self.lowest[i], self.highest[i]
+
+    def bounds(self):
+        """Return the ETF ``(low, fair, high)`` values, or None until every constituent has an estimate."""
+        if self.missing:
+            return None
+        return self.low, self.fair, self.high
+
+    def etf_signal(self, etf_price, transaction_cost=0.0):
+        """Return "BUY" or "SELL" for the ETF when its price is outside the bounds by more than the costs.
+
+        Costs are those of the whole trade, one ETF share and its weighted
+        basket, so an arbitrage is only signalled when it pays for every leg.
+        """
+        if self.missing:
+            return "HOLD"
+        cost = transaction_cost * self.legs
+        if etf_price < self.low - cost:
+            return "BUY"
+        elif etf_price > self.high + cost:
+            return "SELL"
+        return "HOLD"
@@ -0,0 +1,147 @@
+from metrics import log
+from rit_config import API_URL
+
+FINAL_STATUSES = ('TRANSACTED', 'CANCELLED')
+
+
+class TickerBook:
+    """Our position in one ticker: average cost, realized P&L, traded volume and the last mark."""
+
+    __slots__ = ('position', 'average_cost', 'realized', 'volume', 'notional', 'mark')
+
+    def __init__(self):
+        self.position = 0
+        self.average_cost = 0.0
+        self.realized = 0.0
+        self.volume = 0  # shares bought and sold
+        self.notional = 0.0  # value of those shares at their fill prices
+        self.mark = None
+
+    def fill(self, quantity, price):
+        """Apply a signed fill (positive buys) in O(1)."""
+        self.volume += abs(quantity)
+        self.notional += abs(quantity) * price
+        position = self.position
+        if position == 0 or (position > 0) == (quantity > 0):
+            # Opening or adding: the average cost absorbs the fill
+            self.average_cost = (self.average_cost * abs(position) + price * abs(quantity)) / abs(position + quantity)
+        else:
+            # Reducing: the closed part realizes against the average cost, any excess opens at the fill price
+            closed = min(abs(quantity), abs(position))
+            self.realized += closed * (price - self.average_cost) * (1 if position > 0 else -1)
+            if abs(quantity) > abs(position):
+                self.average_cost = price
+            elif abs(quantity) == abs(position):
+                self.average_cost = 0.0
+        self.position = position + quantity
+
+    @property
+    def vwap(self):
+        return self.notional / self.volume if self.volume else None
+
+    @property
+    def unrealized(self):
+        if self.mark is None or self.position == 0:
+            return 0.0
+        return self.position * (self.mark - self.average_cost)
+
+
+class FillTracker:
+    """Exact fills, positions and P&L per ticker, built from the orders we send.
+
+    Fills are matched to our orders by id. Each order response passed to
+    ``on_order`` is compared with the last state seen for that order, and the
+    change in ``quantity_filled`` and ``vwap`` gives the new fill's size and
+    price. ``poll_orders`` asks for the status of the orders still open, and
+    only those. Marks come from prices the strategy already fetched.
+
+    It also stands in for ``PortfolioState`` where orders are sent: order
+    responses, cancels and open-order reads are passed on to ``portfolio``.
+    """
+
+    def __init__(self, session, portfolio=None):
+        self.session = session
+        self.portfolio = portfolio
+        self.books = {}  # ticker -> TickerBook
+        self.seen = {}  # order_id -> (quantity_filled, vwap) already applied
+        self.open = {}  # order_id -> order not yet in a final state
+
+    def book(self, ticker):
+        book = self.books.get(ticker)
+        if book is None:
+            book = self.books[ticker] = TickerBook()
+        return book
+
+    def position(self, ticker):
+        book = self.books.get(ticker)
+        return book.position if book is not None else 0
+
+    def on_order(self, order):
+        """Apply the fills an order response reveals since the last time the order was seen."""
+        if self.portfolio is not None:
+            self.portfolio.on_order(order)
+        order_id = order.get('order_id')
+        if order_id is None:
+            return
+        filled, vwap = order.get('quantity_filled', 0), order.get('vwap')
+        previous_filled, previous_vwap = self.seen.get(order_id, (0, None))
+        if filled > previous_filled:
+            # The new fill's price is what the cumulative vwap gained beyond the earlier fills
+            value = filled * vwap - previous_filled * (previous_vwap or 0.0)
+            quantity = filled - previous_filled
+            sign = 1 if order['action'] == 'BUY' else -1
+            self.book(order['ticker']).fill(sign * quantity, value / quantity)
+            self.seen[order_id] = (filled, vwap)
+        if order.get('status') in FINAL_STATUSES:
+            self.open.pop(order_id, None)
+            self.seen.pop(order_id, None)
+        else:
+            self.open[order_id] = order
+
+    def on_cancel(self, order_id=None):
+        # A cancelled order may have filled in the meantime; it stays open here until polled
+        if self.portfolio is not None:
+            self.portfolio.on_cancel(order_id)
+
+    def open_orders(self, ticker=None):
+        if self.portfolio is not None:
+            return self.portfolio.open_orders(ticker)
+        return [order for order in self.open.values() if ticker is None or order['ticker'] == ticker]
+
+    def poll_orders(self):
+        """Apply new fills of the orders still open.
+
+        With several orders open, one ``/orders?status=OPEN`` call updates
+        those still resting, and only the ones that left the list are fetched
+        by id for their final state.
+        """
+        if len(self.open) > 1:
+            response = self.session.get(f'{API_URL}/orders', params={'status': 'OPEN'})
+            if response.status_code == 200:
+                resting = {order['order_id']: order for order in response.json()}
+                for order_id, order in resting.items():
+                    if order_id in self.open:
+                        self.on_order(order)
+                self._poll_ids([order_id for order_id in self.open if order_id not in resting])
+                return
+            log.warning('open_orders_failed', status=response.status_code)
+        self._poll_ids(list(self.open))
+
+    def _poll_ids(self, order_ids):
+        for order_id in order_ids:
+            response = self.session.get(f'{API_URL}/orders/{order_id}')
+            if response.status_code == 200:
+                self.on_order(response.json())
+            elif response.status_code == 404:
+                self.open.pop(order_id, None)
+            else:
+                log.warning('order_status_failed', order_id=order_id, status=response.status_code)
+
+    def mark(self, ticker, price):
+        """Mark ``ticker`` at a price already at hand, e.g. a mid from a fetched book."""
+        self.book(ticker).mark = price
+
+    def pnl(self):
+        """Return ``(realized, unrealized)`` P&L over every ticker."""
+        return (sum(book.realized for book in self.books.values()),
+                sum(book.unrealized for book in self.books.values()))
@@ -0,0 +1,253 @@
+import argparse
+import importlib
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from metrics import METRICS, InstrumentedSession, log
+from portfolio import PortfolioState
+from recorder import TickRecorder, TickStore
+from rit_async import pooled_session
+from scheduler import Scheduler
+
+STRATEGIES = ('algo1', 'algo2', 'news')
+
+# How long a shared GET response stays fresh, per endpoint (seconds)
+CACHE_TTL = {
+    '/case': 0.1,
+    '/securities': 0.1,
+    '/securities/book': 0.05,
+    '/securities/history': 0.25,
+    '/news': 0.25,
+    '/orders': 0.1,
+}
+
+# Risk limits checked centrally for every strategy
+POSITION_LIMIT = 25000  # Largest absolute position in any one ticker
+GROSS_LIMIT = 100000  # Largest sum of absolute positions
+NET_LIMIT = 50000  # Largest absolute sum of positions
+
+
+def api_path(url):
+    path = urlsplit(url).path
+    return path[3:] if path.startswith('/v1') else path
+
+
+class MarketFeed:
+    """Shared read cache in front of the one RIT session.
+
+    Identical GETs from different strategies within an endpoint's TTL are
+    answered from one response, and only one request per key is in flight at
+    a time, so the three strategies cost roughly one strategy's worth of
+    market-data calls. Strategies run as threads, so the cached snapshots are
+    shared in memory without copying.
+    """
+
+    def __init__(self, session, ttl=CACHE_TTL):
+        self.session = session
+        self.ttl = ttl
+        self.entries = {}  # key -> (fetched_at, response)
+        self.locks = {}  # key -> lock held while the key is being fetched
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None):
+        path = api_path(url)
+        ttl = self.ttl.get(path)
+        if ttl is None:
+            return self.session.get(url, params=params)
+        key = (path, tuple(sorted((params or {}).items())))
+        entry = self.entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return entry[1]
+        with self.lock:
+            key_lock = self.locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                return entry[1]
+            response = self.session.get(url, params=params)
+            if response.status_code == 200:
+                self.entries[key] = (time.monotonic(), response)
+            return response
+
+
+class RiskLimits:
+    """Central position, gross and net limits evaluated against the shared portfolio."""
+
+    def __init__(self, portfolio, position_limit=POSITION_LIMIT, gross_limit=GROSS_LIMIT, net_limit=NET_LIMIT):
+        self.portfolio = portfolio
+        self.position_limit = position_limit
+        self.gross_limit = gross_limit
+        self.net_limit = net_limit
+
+    def check(self, ticker, delta, pending=None):
+        """Return None if a fill of ``delta`` shares fits every limit, else the reason it does not.
+
+        ``pending`` holds the signed quantity of orders already on their way,
+        which counts as filled, as does the unfilled rest of every resting order.
+        """
+        positions = dict(self.portfolio.positions)
+        for order in self.portfolio.open_orders():
+            resting = order['quantity'] - order.get('quantity_filled', 0)
+            order_ticker = order['ticker']
+            positions[order_ticker] = positions.get(order_ticker, 0) + (resting if order['action'] == 'BUY' else -resting)
+        for pending_ticker, quantity in (pending or {}).items():
+            positions[pending_ticker] = positions.get(pending_ticker, 0) + quantity
+        current = positions.get(ticker, 0)
+        projected = current + delta
+        if abs(projected) > self.position_limit and abs(projected) > abs(current):
+            return f'position limit {self.position_limit} on {ticker}'
+        gross = sum(abs(position) for position in positions.values()) - abs(current) + abs(projected)
+        if gross > self.gross_limit and abs(projected) > abs(current):
+            return f'gross limit {self.gross_limit}'
+        net = sum(positions.values()) - current + projected
+        if abs(net) > self.net_limit and abs(net) > abs(sum(positions.values())):
+            return f'net limit {self.net_limit}'
+        return None
+
+
+class Rejection:
+    """Response for an order stopped before it was sent; has the parts of ``requests.Response`` the strategies use."""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return json.dumps(self._body)
+
+    def json(self):
+        return self._body
+
+
+class OrderGateway:
+    """The single path for orders: risk check, send, then record in the shared portfolio.
+
+    Headroom is reserved under a lock before an order is sent and released
+    once its response is applied, so concurrent orders from different
+    strategies cannot both claim the same room while still going out in
+    parallel.
+    """
+
+    def __init__(self, session, portfolio, risk):
+        self.session = session
+        self.portfolio = portfolio
+        self.risk = risk
+        self.pending = {}  # ticker -> signed quantity of orders in flight
+        self.lock = threading.Lock()
+
+    def submit(self, strategy, url, params):
+        ticker, action = params.get('ticker'), str(params.get('action', '')).upper()
+        quantity = int(float(params.get('quantity', 0)))
+        delta = quantity if action == 'BUY' else -quantity
+        with self.lock:
+            reason = self.risk.check(ticker, delta, self.pending)
+            if reason is None:
+                self.pending[ticker] = self.pending.get(ticker, 0) + delta
+        if reason is not None:
+            log.warning('order_blocked', strategy=strategy, ticker=ticker, action=action,
+                        quantity=quantity, reason=reason)
+            return Rejection(403, {'code': 'RISK_LIMIT', 'message': reason})
+        try:
+            response = self.session.post(url, params=params)
+            if response.ok:
+                self.portfolio.on_order(response.json())
+        finally:
+            with self.lock:
+                self.pending[ticker] -= delta
+        return response
+
+
+class HostSession:
+    """What a strategy sees as its ``requests.Session``: reads via the feed, orders via the gateway."""
+
+    def __init__(self, name, feed, gateway, session):
+        self.name = name
+        self.feed = feed
+        self.gateway = gateway
+        self.session = session
+        self.headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass  # The underlying session belongs to the host
+
+    def request(self, method, url, params=None, **kwargs):
+        method = method.upper()
+        if method == 'GET':
+            return self.feed.get(url, params)
+        if method == 'POST' and api_path(url) == '/orders':
+            # Timed here because algo1 sends from its executor threads, which are not bound to it
+            METRICS.order_sent(self.name)
+            return self.gateway.submit(self.name, url, params or {})
+        return self.session.request(method, url, params=params)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def run_strategy(name, session, portfolio, params):
+    """Run one strategy plugin until it is done; meant to be a thread target."""
+    module = importlib.import_module(name)
+    METRICS.bind(name)
+    try:
+        with module.strategy(session, portfolio, **params) as (watchers, step, done):
+            Scheduler(watchers, metrics=METRICS).run(step, stop=done)
+        log.info('strategy_finished', strategy=name)
+    except Exception as e:
+        log.error('strategy_failed', strategy=name, error=repr(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several strategies against one shared RIT session.")
+    parser.add_argument('strategies', nargs='+', choices=STRATEGIES)
+    parser.add_argument('--record', metavar='DIR', help="also record market data to DIR through the shared feed")
+    args = parser.parse_args()
+
+    METRICS.start_exporter()
+    session = pooled_session(pool_size=8, session=InstrumentedSession())
+    portfolio = PortfolioState(session).start()
+    feed = MarketFeed(session)
+    gateway = OrderGateway(session, portfolio, RiskLimits(portfolio))
+
+    workers = [threading.Thread(target=run_strategy, name=name, daemon=True,
+                                args=(name, HostSession(name, feed, gateway, session), portfolio, {}))
+               for name in args.strategies]
+    recorder = None
+    if args.record:
+        recorder = TickRecorder(HostSession('recorder', feed, gateway, session), TickStore(args.record)).start()
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=0.5)
+    except KeyboardInterrupt:
+        log.info('host_interrupted')
+    finally:
+        if recorder is not None:
+            recorder.stop()
+        portfolio.stop()
+        METRICS.export()
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
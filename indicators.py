@@ -0,0 +1,72 @@
+import math
+from collections import deque
+
+
+class RollingMean:
+    """Mean of the last ``window`` values, kept in a ring buffer with a running sum."""
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def push(self, value):
+        if self.count == self.window:
+            self.total -= self.buffer[self.index]
+        else:
+            self.count += 1
+        self.buffer[self.index] = value
+        self.total += value
+        self.index = (self.index + 1) % self.window
+        if self.index == 0:
+            # Re-sum once per lap so rounding error from the running sum cannot build up
+            self.total = math.fsum(self.buffer[:self.count])
+
+    @property
+    def value(self):
+        """The current mean, or None until the window is full."""
+        return self.total / self.window if self.count == self.window else None
+
+
+class RollingMin:
+    """Minimum of the last ``window`` values, kept in a monotonic deque."""
+
+    def __init__(self, window):
+        self.window = window
+        self.seq = 0
+        self.queue = deque()  # (seq, value) pairs with increasing values
+
+    def push(self, value):
+        while self.queue and self.queue[-1][1] >= value:
+            self.queue.pop()
+        self.queue.append((self.seq, value))
+        if self.queue[0][0] <= self.seq - self.window:
+            self.queue.popleft()
+        self.seq += 1
+
+    @property
+    def value(self):
+        """The current minimum, or None until the window is full."""
+        return self.queue[0][1] if self.seq >= self.window else None
+
+
+class IndicatorEngine:
+    """Incremental moving average of ``close`` and rolling minimum of ``low`` over price bars."""
+
+    def __init__(self, window):
+        self.window = window
+        self.moving_average = RollingMean(window)
+        self.rolling_low = RollingMin(window)
+        self.last_tick = 0  # Tick of the newest bar consumed so far
+
+    def update(self, bars):
+        """Consume bars newer than ``last_tick`` (any order) and return ``(moving_average, low)``."""
+        for bar in sorted(bars, key=lambda bar: bar['tick']):
+            if bar['tick'] <= self.last_tick:
+                continue
+            self.moving_average.push(bar['close'])
+            self.rolling_low.push(bar['low'])
+            self.last_tick = bar['tick']
+        return self.moving_average.value, self.rolling_low.value
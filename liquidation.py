@@ -0,0 +1,105 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from depth import book_side
+from metrics import log
+from order_gateway import OrderBatch
+from rit_config import API_URL
+
+LIQUIDATION_TICK = 280  # Tick from which positions are worked down
+FLAT_TICK = 295  # Tick by which positions must be flat; anything left then goes out at MARKET
+PARTICIPATION = 0.25  # Share of the visible opposite-side depth a child may take beyond its TWAP slice (a floor)
+BOOK_LEVELS = 5  # Levels of the opposite side counted as visible depth
+
+
+class Liquidator:
+    """Works every position in ``tickers`` down to zero between ``start_tick`` and ``end_tick``.
+
+    On each tick the remaining position is split evenly over the ticks left
+    (TWAP). When the book is deep enough a child may instead take up to
+    ``participation`` of the visible depth (POV), which front-loads the
+    liquidation while liquidity allows. A thin book never shrinks the TWAP
+    slice, so a child may then take more than ``participation`` of it. Each
+    child is a LIMIT at the deepest level it needs, so it never sweeps
+    further into a thin book. Whatever did not fill is cancelled and
+    re-sliced on the next tick. At ``end_tick`` the remainder goes out at
+    MARKET. All tickers' books are fetched and their children sent
+    concurrently.
+    """
+
+    def __init__(self, session, tickers, start_tick=LIQUIDATION_TICK, end_tick=FLAT_TICK, portfolio=None,
+                 limits=None, participation=PARTICIPATION, levels=BOOK_LEVELS):
+        self.session = session
+        self.tickers = tuple(tickers)
+        self.start_tick = start_tick
+        self.end_tick = end_tick
+        self.portfolio = portfolio
+        self.participation = participation
+        self.levels = levels
+        self.limits = limits
+        self.batch = OrderBatch(session, portfolio, limits)
+        self.flat = False
+
+    def active(self, tick):
+        return tick >= self.start_tick
+
+    def positions(self):
+        """Fetch the position in every ticker with one ``/securities`` call."""
+        response = self.session.get(f'{API_URL}/securities')
+        if response.status_code != 200:
+            raise Exception(f"Error fetching positions: {response.status_code}")
+        return {stock['ticker']: stock.get('position', 0) for stock in response.json() if stock['ticker'] in self.tickers}
+
+    def fetch_book(self, ticker):
+        response = self.session.get(f'{API_URL}/securities/book', params={'ticker': ticker, 'limit': self.levels})
+        if response.status_code != 200:
+            raise Exception(f"Error fetching book for {ticker}: {response.status_code}")
+        return response.json()
+
+    def cancel(self, ticker):
+        """Cancel every resting order on ``ticker``, earlier children included."""
+        url = f'{API_URL}/commands/cancel'
+        if self.limits is not None:
+            self.limits.acquire(url)
+        response = self.session.post(url, params={'ticker': ticker})
+        if response.ok and self.portfolio is not None:
+            for order in self.portfolio.open_orders(ticker):
+                self.portfolio.on_cancel(order['order_id'])
+
+    def child_order(self, position, book, ticks_left):
+        """Return ``(quantity, limit)`` of this tick's child order; ``limit`` is None for MARKET."""
+        quantity = abs(position)
+        if ticks_left <= 0:
+            return quantity, None
+        levels = book['bids' if position > 0 else 'asks'][:self.levels]
+        if not levels:
+            return 0, None
+        prices, cumulative = book_side(levels)
+        twap = math.ceil(quantity / ticks_left)
+        pov = int(self.participation * cumulative[-1])
+        child = min(quantity, max(twap, pov))
+        level = min(int(np.searchsorted(cumulative, child)), len(prices) - 1)
+        return child, float(prices[level])
+
+    def step(self, tick, books=None):
+        """Send this tick's child orders; ``books`` may hold already fetched books by ticker."""
+        if not self.active(tick):
+            return
+        positions = {ticker: position for ticker, position in self.positions().items() if position}
+        self.flat = not positions
+        if self.flat:
+            return
+        books = dict(books or {})
+        missing = [ticker for ticker in positions if ticker not in books]
+        with ThreadPoolExecutor(max_workers=max(1, len(positions))) as executor:
+            list(executor.map(self.cancel, positions))
+            books.update(zip(missing, executor.map(self.fetch_book, missing)))
+
+        ticks_left = self.end_tick - tick
+        for ticker, position in positions.items():
+            quantity, limit = self.child_order(position, books[ticker], ticks_left)
+            self.batch.add(ticker, 'SELL' if position > 0 else 'BUY', quantity, limit)
+            log.info('liquidation_child', tick=tick, ticker=ticker, position=position, quantity=quantity, price=limit)
+        self.batch.flush()
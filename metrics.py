@@ -0,0 +1,257 @@
+import atexit
+import bisect
+import json
+import queue
+import sys
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+import requests
+
+from scheduler import ThrottledSession
+
+METRICS_FILE = 'metrics.json'  # Default export target
+EXPORT_INTERVAL = 10.0  # Seconds between periodic exports
+
+# Upper bounds of the latency buckets, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float('inf'))
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; recording is a bisect and two additions."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the ``pct`` percentile."""
+        target, seen = pct / 100 * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max)
+        return 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': self.max,
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts) if count},
+        }
+
+
+def endpoint_name(method, url):
+    """Normalise a request to ``"METHOD /path"`` with numeric ids replaced by ``{id}``."""
+    path = urlsplit(url).path
+    path = path[3:] if path.startswith('/v1') else path
+    return f"{method.upper()} " + '/'.join('{id}' if part.isdigit() else part for part in path.split('/'))
+
+
+class Metrics:
+    """Per-endpoint latency, request, error and 429 counts plus tick-to-decision-to-order timings.
+
+    Stage timings are kept per strategy so that several strategies can share
+    one instance: a thread that called ``bind`` times its stages under that
+    strategy's name, and stages are then recorded as ``"<strategy>.<stage>"``.
+    """
+
+    def __init__(self):
+        self.endpoints = {}  # endpoint -> {'latency': Histogram, 'requests': n, 'errors': n, 'throttled': n}
+        self.stages = {}  # stage -> Histogram
+        self.clocks = {}  # strategy (None when unbound) -> [tick_started, decided]
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def bind(self, strategy):
+        """Time the calling thread's stages under ``strategy``."""
+        self.local.strategy = strategy
+
+    def _clock(self, strategy):
+        if strategy is None:
+            strategy = getattr(self.local, 'strategy', None)
+        return strategy, self.clocks.setdefault(strategy, [None, None])
+
+    def observe(self, endpoint, seconds, status=None):
+        """Record one API call; ``status`` is None when the request raised."""
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {'latency': Histogram(), 'requests': 0, 'errors': 0, 'throttled': 0}
+            stats['latency'].record(seconds)
+            stats['requests'] += 1
+            if status is None or status >= 400:
+                stats['errors'] += 1
+            if status == 429:
+                stats['throttled'] += 1
+
+    def stage(self, name, seconds, strategy=None):
+        if strategy is not None:
+            name = f'{strategy}.{name}'
+        with self.lock:
+            if name not in self.stages:
+                self.stages[name] = Histogram()
+            self.stages[name].record(seconds)
+
+    def start_tick(self, strategy=None):
+        """Mark the moment a new tick (or other input change) was observed."""
+        strategy, clock = self._clock(strategy)
+        clock[:] = [time.perf_counter(), None]
+
+    def decision(self, strategy=None):
+        """Mark the moment the strategy reached its trading decision."""
+        strategy, clock = self._clock(strategy)
+        if clock[0] is not None and clock[1] is None:
+            clock[1] = time.perf_counter()
+            self.stage('tick_to_decision', clock[1] - clock[0], strategy)
+
+    def order_sent(self, strategy=None):
+        """Mark an order going out; only the first order after a decision is timed."""
+        strategy, clock = self._clock(strategy)
+        tick_started, decided = clock
+        if tick_started is None:
+            return
+        now = time.perf_counter()
+        self.stage('tick_to_order', now - tick_started, strategy)
+        if decided is not None:
+            self.stage('decision_to_order', now - decided, strategy)
+        clock[0] = None
+
+    def end_step(self, seconds, strategy=None):
+        strategy, _ = self._clock(strategy)
+        self.stage('iteration', seconds, strategy)
+
+    def snapshot(self):
+        """Return all metrics as plain data."""
+        with self.lock:
+            endpoints = {}
+            for endpoint, stats in self.endpoints.items():
+                count = stats['requests']
+                endpoints[endpoint] = dict(
+                    stats['latency'].summary(), requests=count,
+                    error_rate=stats['errors'] / count, throttle_rate=stats['throttled'] / count)
+            stages = {name: histogram.summary() for name, histogram in self.stages.items()}
+        return {'time': time.time(), 'endpoints': endpoints, 'stages': stages}
+
+    def export(self, target=METRICS_FILE):
+        """Write the snapshot as JSON to a file, or POST it when ``target`` is an http(s) URL."""
+        data = json.dumps(self.snapshot()).encode()
+        if target.startswith(('http://', 'https://')):
+            request = urllib.request.Request(target, data=data, headers={'Content-Type': 'application/json'})
+            urllib.request.urlopen(request, timeout=2).close()
+        else:
+            with open(target, 'wb') as f:
+                f.write(data)
+
+    def start_exporter(self, target=METRICS_FILE, interval=EXPORT_INTERVAL):
+        """Export every ``interval`` seconds on a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.export(target)
+                except Exception as e:
+                    log.error('metrics_export_failed', error=str(e))
+        threading.Thread(target=run, daemon=True).start()
+
+
+class StructuredLogger:
+    """JSON-lines logger whose callers only enqueue a tuple; a daemon thread formats and writes."""
+
+    def __init__(self, stream=sys.stderr, level='INFO'):
+        self.stream = stream
+        self.level = LEVELS[level]
+        self.queue = queue.SimpleQueue()
+        self.write_lock = threading.Lock()
+        threading.Thread(target=self._drain, daemon=True).start()
+        atexit.register(self.flush)
+
+    def set_level(self, level):
+        self.level = LEVELS[level]
+
+    def log(self, level, event, **fields):
+        if LEVELS[level] >= self.level:
+            self.queue.put((time.time(), level, event, fields))
+
+    def debug(self, event, **fields):
+        self.log('DEBUG', event, **fields)
+
+    def info(self, event, **fields):
+        self.log('INFO', event, **fields)
+
+    def warning(self, event, **fields):
+        self.log('WARNING', event, **fields)
+
+    def error(self, event, **fields):
+        self.log('ERROR', event, **fields)
+
+    def _write(self, entry):
+        timestamp, level, event, fields = entry
+        record = {'ts': round(timestamp, 6), 'level': level, 'event': event}
+        record.update(fields)
+        with self.write_lock:
+            self.stream.write(json.dumps(record, default=str) + '\n')
+
+    def _drain(self):
+        while True:
+            self._write(self.queue.get())
+            if self.queue.empty():
+                self.stream.flush()
+
+    def flush(self):
+        """Write out everything still queued."""
+        while True:
+            try:
+                self._write(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        self.stream.flush()
+
+
+class InstrumentedSession(ThrottledSession):
+    """``ThrottledSession`` that times every request into ``metrics``.
+
+    Time spent waiting on the rate limiter is recorded separately as the
+    ``throttle_wait`` stage, so endpoint latencies are the API's own.
+    """
+
+    def __init__(self, metrics=None, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics if metrics is not None else METRICS
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = endpoint_name(method, url)
+        if endpoint == 'POST /orders':
+            self.metrics.order_sent()
+        queued = time.perf_counter()
+        self.limiter.acquire()
+        start = time.perf_counter()
+        self.metrics.stage('throttle_wait', start - queued)
+        status = None
+        try:
+            response = requests.Session.request(self, method, url, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self.metrics.observe(endpoint, time.perf_counter() - start, status)
+
+
+# Process-wide defaults used by the strategies
+METRICS = Metrics()
+log = StructuredLogger()
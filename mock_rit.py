@@ -0,0 +1,380 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Default artificial latency per request, roughly what a local RIT client adds
+LATENCY = 0.002
+
+# Simulated market parameters
+CASE_TICKS = 300  # Length of a case
+SPREAD = 0.02  # Quoted spread around the mid price
+DEPTH = 10  # Price levels on each side of the book
+LEVEL_SIZE = 2000  # Shares available at each level
+TICK_SIZE = 0.01  # Price increment between levels
+FEE = 0.0  # Commission per share traded
+
+TRADER_ID = 'mock'
+
+
+def synthetic_case(seed=0, ticks=CASE_TICKS):
+    """Generate a random case covering the tickers traded by algo1, algo2 and news.py."""
+    rng = random.Random(seed)
+
+    def walk(start, volatility, target=None):
+        prices, price = [], start
+        for tick in range(ticks):
+            if target is not None:
+                price += (target - price) / (ticks - tick)
+            price = max(0.01, price + rng.gauss(0, volatility))
+            prices.append(round(price, 2))
+        return prices
+
+    crzy = walk(10.0, 0.03)
+    finals = {'UB': rng.uniform(40, 60), 'GEM': rng.uniform(20, 30)}
+    prices = {
+        'CRZY_M': [round(p + rng.gauss(0, 0.02), 2) for p in crzy],
+        'CRZY_A': [round(p + rng.gauss(0, 0.02), 2) for p in crzy],
+        'ALGO': walk(15.0, 0.05),
+        'UB': walk(rng.uniform(40, 60), 0.1, finals['UB']),
+        'GEM': walk(rng.uniform(20, 30), 0.05, finals['GEM']),
+    }
+    prices['ETF'] = [round(ub + gem + rng.gauss(0, 0.05), 2) for ub, gem in zip(prices['UB'], prices['GEM'])]
+
+    news = [{'news_id': 1, 'period': 1, 'tick': 0, 'ticker': '', 'headline': 'Welcome to the case', 'body': ''}]
+    for tick in range(15, ticks, 15):
+        for ticker, final in finals.items():
+            band = (ticks - tick) / 50
+            estimate = round(final + rng.uniform(-band, band), 2)
+            news.append({
+                'news_id': len(news) + 1, 'period': 1, 'tick': tick, 'ticker': ticker,
+                'headline': f'{ticker} price estimate',
+                'body': f'After {tick} seconds, the final price of {ticker} is estimated to be ${estimate}',
+            })
+    return {'ticks': ticks, 'prices': prices, 'news': news}
+
+
+def load_case(path):
+    """Load a recorded case saved with ``save_case``."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_case(case, path):
+    """Save a case as JSON so it can be replayed later."""
+    with open(path, 'w') as f:
+        json.dump(case, f)
+
+
+class MockRIT:
+    """In-memory stand-in for the RIT REST API that replays a case and matches our orders.
+
+    The book for every ticker is rebuilt around the case mid price on each
+    tick. MARKET orders and marketable LIMIT orders walk that book; resting
+    LIMIT orders fill on a later tick once the opposite side of the book
+    reaches their price.
+    """
+
+    def __init__(self, case=None, tick=1, spread=SPREAD, depth=DEPTH, level_size=LEVEL_SIZE, fee=FEE):
+        self.case = case if case is not None else synthetic_case()
+        self.ticks = self.case['ticks']
+        self.prices = self.case['prices']
+        self.news = self.case['news']
+        self.spread = spread
+        self.depth = depth
+        self.level_size = level_size
+        self.fee = fee
+        self.tick = tick
+        self.orders = {}  # order_id -> order
+        self.open_orders = {}  # order_id -> resting LIMIT order
+        self.positions = {ticker: 0 for ticker in self.prices}
+        self.cash = 0.0
+        self.fills = []  # (tick, order_id, ticker, action, quantity, price)
+        self.books = {}
+        self.lock = threading.RLock()
+
+    # Market state
+
+    def mid(self, ticker, tick=None):
+        tick = self.tick if tick is None else tick
+        path = self.prices[ticker]
+        return path[min(max(tick, 1), len(path)) - 1]
+
+    def book(self, ticker):
+        """Return the liquidity left this tick as ``{'bids': [[price, qty], ...], 'asks': [...]}``."""
+        if ticker not in self.books:
+            mid = self.mid(ticker)
+            half = self.spread / 2
+            self.books[ticker] = {
+                'bids': [[round(mid - half - i * TICK_SIZE, 2), self.level_size] for i in range(self.depth)],
+                'asks': [[round(mid + half + i * TICK_SIZE, 2), self.level_size] for i in range(self.depth)],
+            }
+        return self.books[ticker]
+
+    def advance(self):
+        """Move to the next tick and fill resting orders the new book has reached."""
+        with self.lock:
+            self.tick += 1
+            self.books = {}
+            for order in list(self.open_orders.values()):
+                best = self.book(order['ticker'])['asks' if order['action'] == 'BUY' else 'bids'][0][0]
+                if best <= order['price'] if order['action'] == 'BUY' else best >= order['price']:
+                    self._match(order)
+
+    def pnl(self):
+        """Mark-to-market profit and loss at the current mid prices."""
+        return self.cash + sum(position * self.mid(ticker) for ticker, position in self.positions.items())
+
+    # Order matching
+
+    def _fill(self, order, quantity, price):
+        sign = 1 if order['action'] == 'BUY' else -1
+        filled = order['quantity_filled']
+        order['vwap'] = ((order['vwap'] or 0) * filled + price * quantity) / (filled + quantity)
+        order['quantity_filled'] = filled + quantity
+        self.positions[order['ticker']] += sign * quantity
+        self.cash -= sign * quantity * price + self.fee * quantity
+        self.fills.append((self.tick, order['order_id'], order['ticker'], order['action'], quantity, price))
+
+    def _match(self, order):
+        levels = self.book(order['ticker'])['asks' if order['action'] == 'BUY' else 'bids']
+        limit = order['price']
+        for level in levels:
+            remaining = order['quantity'] - order['quantity_filled']
+            if remaining <= 0:
+                break
+            if limit is not None and (level[0] > limit if order['action'] == 'BUY' else level[0] < limit):
+                break
+            quantity = min(remaining, level[1])
+            if quantity:
+                # Resting orders fill at their own price, incoming orders at the book's
+                price = limit if order['order_id'] in self.open_orders else level[0]
+                self._fill(order, quantity, price)
+                level[1] -= quantity
+        remaining = order['quantity'] - order['quantity_filled']
+        if order['type'] == 'MARKET' and remaining > 0:
+            # The simulated book is finite; the rest of a MARKET order goes at the worst level
+            self._fill(order, remaining, levels[-1][0])
+            remaining = 0
+        if remaining == 0:
+            order['status'] = 'TRANSACTED'
+            self.open_orders.pop(order['order_id'], None)
+        elif order['type'] == 'LIMIT':
+            self.open_orders[order['order_id']] = order
+
+    def submit(self, ticker, order_type, action, quantity, price=None):
+        """Accept a new order, match it and return it."""
+        order = {
+            'order_id': len(self.orders) + 1, 'period': 1, 'tick': self.tick, 'trader_id': TRADER_ID,
+            'ticker': ticker, 'type': order_type, 'quantity': quantity, 'action': action,
+            'price': price, 'quantity_filled': 0, 'vwap': None, 'status': 'OPEN',
+        }
+        self.orders[order['order_id']] = order
+        self._match(order)
+        return order
+
+    def cancel(self, order_id):
+        order = self.open_orders.pop(order_id, None)
+        if order is not None:
+            order['status'] = 'CANCELLED'
+        return order
+
+    # REST API
+
+    def _security(self, ticker):
+        book = self.book(ticker)
+        return {
+            'ticker': ticker, 'position': self.positions[ticker], 'last': self.mid(ticker),
+            'bid': book['bids'][0][0], 'bid_size': book['bids'][0][1],
+            'ask': book['asks'][0][0], 'ask_size': book['asks'][0][1],
+        }
+
+    def _book_side(self, ticker, side, limit):
+        action = 'BUY' if side == 'bids' else 'SELL'
+        entries = [{'price': price, 'quantity': quantity, 'quantity_filled': 0, 'trader_id': 'ANON'}
+                   for price, quantity in self.book(ticker)[side] if quantity]
+        entries += [{'price': order['price'], 'quantity': order['quantity'], 'order_id': order['order_id'],
+                     'quantity_filled': order['quantity_filled'], 'trader_id': TRADER_ID}
+                    for order in self.open_orders.values() if order['ticker'] == ticker and order['action'] == action]
+        entries.sort(key=lambda entry: -entry['price'] if side == 'bids' else entry['price'])
+        return entries[:limit]
+
+    def _history(self, ticker, limit):
+        bars = []
+        for tick in range(self.tick, max(0, self.tick - limit), -1):
+            open_, close = self.mid(ticker, tick - 1), self.mid(ticker, tick)
+            bars.append({'tick': tick, 'open': open_, 'close': close,
+                         'high': round(max(open_, close) + self.spread / 2, 2),
+                         'low': round(min(open_, close) - self.spread / 2, 2)})
+        return bars
+
+    def handle(self, method, path, params):
+        """Dispatch one API call and return ``(status, body)``."""
+        path = path[3:] if path.startswith('/v1') else path
+        with self.lock:
+            if method == 'GET' and path == '/case':
+                status = 'ACTIVE' if self.tick < self.ticks else 'STOPPED'
+                return 200, {'name': 'mock', 'period': 1, 'tick': self.tick, 'ticks_per_period': self.ticks, 'status': status}
+            if method == 'GET' and path == '/securities':
+                tickers = [params['ticker']] if 'ticker' in params else list(self.prices)
+                return 200, [self._security(ticker) for ticker in tickers if ticker in self.prices]
+            if method == 'GET' and path in ('/securities/book', '/securities/history'):
+                ticker = params.get('ticker')
+                if ticker not in self.prices:
+                    return 400, {'code': 'BAD_REQUEST', 'message': 'Unknown ticker'}
+                if path == '/securities/book':
+                    limit = int(params.get('limit', 20))
+                    return 200, {'bids': self._book_side(ticker, 'bids', limit), 'asks': self._book_side(ticker, 'asks', limit)}
+                return 200, self._history(ticker, int(params.get('limit', self.ticks)))
+            if method == 'GET' and path == '/news':
+                since, limit = int(params.get('since', 0)), int(params.get('limit', 20))
+                news = [item for item in self.news if item['tick'] <= self.tick and item['news_id'] > since]
+                return 200, news[::-1][:limit]
+            if method == 'GET' and path == '/orders':
+                status = params.get('status', 'OPEN')
+                orders = self.open_orders.values() if status == 'OPEN' else self.orders.values()
+                return 200, [dict(order) for order in orders if order['status'] == status]
+            if method in ('GET', 'DELETE') and path.startswith('/orders/'):
+                order = self.orders.get(int(path.rsplit('/', 1)[1]))
+                if order is None:
+                    return 404, {'code': 'NOT_FOUND', 'message': 'Unknown order'}
+                if method == 'GET':
+                    return 200, dict(order)
+                if self.cancel(order['order_id']) is None:
+                    return 400, {'code': 'BAD_REQUEST', 'message': 'Order is not open'}
+                return 200, {'success': True}
+            if method == 'POST' and path == '/orders':
+                ticker, order_type = params.get('ticker'), params.get('type', 'MARKET')
+                if ticker not in self.prices or self.tick >= self.ticks:
+                    return 400, {'code': 'BAD_REQUEST', 'message': 'Order rejected'}
+                price = round(float(params['price']), 2) if order_type == 'LIMIT' else None
+                order = self.submit(ticker, order_type, params['action'].upper(), int(float(params['quantity'])), price)
+                return 200, dict(order)
+            if method == 'POST' and path == '/commands/cancel':
+                ticker = params.get('ticker')
+                cancelled = [order['order_id'] for order in list(self.open_orders.values())
+                             if params.get('all') == '1' or order['ticker'] == ticker]
+                for order_id in cancelled:
+                    self.cancel(order_id)
+                return 200, {'cancelled_order_ids': cancelled}
+        return 404, {'code': 'NOT_FOUND', 'message': f'{method} {path}'}
+
+
+class SimResponse:
+    """The parts of ``requests.Response`` the strategies use."""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return json.dumps(self._body)
+
+    def json(self):
+        return self._body
+
+
+class SimSession:
+    """Drop-in for ``requests.Session`` that dispatches straight into a ``MockRIT`` without HTTP."""
+
+    def __init__(self, market):
+        self.market = market
+        self.headers = {}
+        self.requests = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        self.requests += 1
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query))
+        query.update({key: str(value) for key, value in (params or {}).items()})
+        return SimResponse(*self.market.handle(method.upper(), parts.path, query))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def make_handler(market, latency=LATENCY):
+    """Build a request handler class bound to ``market``."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+        def _dispatch(self, method):
+            parts = urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                self.rfile.read(length)
+            if latency:
+                time.sleep(latency)
+            status, body = market.handle(method, parts.path, dict(parse_qsl(parts.query)))
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def do_DELETE(self):
+            self._dispatch('DELETE')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(market=None, host='localhost', port=0, latency=LATENCY, tick_seconds=None):
+    """Start a mock RIT server on a background thread and return it; ``port=0`` picks a free port.
+
+    With ``tick_seconds`` set the case advances on its own, like a live RIT client.
+    """
+    market = market if market is not None else MockRIT(tick=10)
+    server = ThreadingHTTPServer((host, port), make_handler(market, latency))
+    server.daemon_threads = True
+    server.market = market
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    if tick_seconds:
+        def clock():
+            while market.tick < market.ticks:
+                time.sleep(tick_seconds)
+                market.advance()
+        threading.Thread(target=clock, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    server = serve(MockRIT(), port=9999, tick_seconds=1.0)
+    print("Mock RIT server listening on http://localhost:9999/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
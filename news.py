@@ -1,116 +1,57 @@
-import requests
-import time
-import re
-
-# API Key and Base URL
-API_KEY = {'X-API-Key': 'II679A88'}  # Replace with your actual API key
-API_URL = "http://localhost:9999/v1"
+import os
+from contextlib import contextmanager
+
+from fair_value import FairValueEngine, load_weights
+from fills import FillTracker
+from liquidation import Liquidator
+from news_feed import NewsFeed, parse_news_item
+from order_gateway import EndpointLimits, OrderBatch
+from portfolio import PortfolioState
+from metrics import METRICS, InstrumentedSession, log
+from rit_config import API_URL
+from scheduler import Scheduler, watch_news, watch_tick
 
 # Trading parameters
 MAX_POSITION = 25000  # Maximum allowed position
 INITIAL_ORDER_SIZE = 5000  # Initial maximum order size
-TIME_LIMIT = 290  # Time near the session end when orders should be canceled
+TIME_LIMIT = 280  # Tick from which new trades stop and positions are worked down to flat
 TRANSACTION_COST = 0.02  # Transaction cost per share
 
-processed_news_ids = set()
 # Tickers for PD3
 TICKER_UB = 'UB'
 TICKER_GEM = 'GEM'
 TICKER_ETF = 'ETF'
 
-# Track cumulative price estimates
-price_estimates = {
-    'UB': {'lowest': float('-inf'), 'highest': float('inf'), "pred": None},
-    'GEM': {'lowest': float('-inf'), 'highest': float('inf'), "pred": None},
-}
-
-
-def get_open_orders(session):
-    """Fetch all open orders."""
-    response = session.get(f'{API_URL}/orders', params={'status': 'OPEN'})
-    if response.status_code == 200:
-        return response.json()
-    else:
-        raise Exception(f"Error fetching open orders: {response.status_code}")
-
-
-def get_tick(session):
-    resp = session.get(f'{API_URL}/case')
-    if resp.ok:
-        case = resp.json()
-        return case['tick']
-    raise Exception("Error fetching tick.")
-
-
-def get_last_price(session, ticker):
-    """Fetch the last traded price for the given stock symbol."""
-    payload = {'ticker': ticker, 'limit': 1}
-    response = session.get(f'{API_URL}/securities/history', params=payload)
-    if response.status_code == 200:
-        price_history = response.json()
-        if price_history:
-            return price_history[0]['close']  # Return the last close price
-    else:
-        raise Exception(f"Error fetching last price: {response.status_code}")
+ETF_WEIGHTS = {TICKER_UB: 1.0, TICKER_GEM: 1.0}  # Shares of each constituent per ETF share
+BASKET_FILE = 'basket.json'  # Optional file overriding ETF_WEIGHTS
 
 
-def get_news(session):
-    """Fetch the latest news from the RIT API."""
-    url = f'{API_URL}/news'
-    response = session.get(url)
+def get_price_snapshot(session, tickers=(TICKER_UB, TICKER_GEM, TICKER_ETF)):
+    """Fetch the securities for ``tickers`` in a single call, keyed by ticker."""
+    response = session.get(f'{API_URL}/securities')
     if response.status_code == 200:
-        return response.json()
+        return {stock['ticker']: stock for stock in response.json() if stock['ticker'] in tickers}
     else:
-        raise Exception(f"Error fetching news: {response.status_code}")
+        raise Exception(f"Error fetching securities: {response.status_code}")
 
 
-def calculate_range(final_estimate, elapsed_seconds):
-    """Calculate the possible price range based on elapsed time."""
-    adjustment = (300 - elapsed_seconds) / 50
-    highest_possible_price = final_estimate + adjustment
-    lowest_possible_price = final_estimate - adjustment
-    return lowest_possible_price, highest_possible_price
+def update_price_estimates(engine, ticker, final_estimate, elapsed_seconds):
+    """Narrow the estimate range of ``ticker`` with a new news item."""
+    lowest, highest = engine.update(ticker, final_estimate, elapsed_seconds)
+    log.info('estimate_range', ticker=ticker, lowest=lowest, highest=highest)
 
 
-def update_price_estimates(ticker, final_estimate, elapsed_seconds):
-    """Update the cumulative price estimate range by finding the overlap."""
-    global price_estimates
-    low, high = calculate_range(final_estimate, elapsed_seconds)
-    price_estimates[ticker]['lowest'] = max(price_estimates[ticker]['lowest'], low)
-    price_estimates[ticker]['highest'] = min(price_estimates[ticker]['highest'], high)
-    price_estimates[ticker]["pred"] = final_estimate
-
-    print(f"Updated range for {ticker}: Lowest = ${price_estimates[ticker]['lowest']:.2f}, Highest = ${price_estimates[ticker]['highest']:.2f}")
-
-
-def extract_elapsed_time(news_body):
-    """Extract elapsed time from news body."""
-    match = re.search(r'After (\d+) seconds', news_body)
-    if match:
-        return int(match.group(1))
-    return None  # Return None if no match is found
-
-
-def process_news_item(news_item):
+def process_news_item(engine, news_item):
     """Process a single news item to update the price estimates."""
-    ticker = None
-    if "UB" in news_item['headline']:
-        ticker = 'UB'
-    elif "GEM" in news_item['headline']:
-        ticker = 'GEM'
-
-    if ticker:
-        final_estimate = float(news_item['body'].split('$')[1])
-        elapsed_seconds = extract_elapsed_time(news_item['body'])
-        if elapsed_seconds is not None:
-            update_price_estimates(ticker, final_estimate, elapsed_seconds)
+    parsed = parse_news_item(news_item, engine.tickers)
+    if parsed is not None:
+        update_price_estimates(engine, *parsed)
 
 
-def generate_signal(session, ticker):
+def generate_signal(engine, snapshot, ticker):
     """Generate buy, sell, or hold signal for a given ticker based on the estimated range."""
-    current_price = get_last_price(session, ticker)
-    lowest_estimate = price_estimates[ticker]['lowest']
-    highest_estimate = price_estimates[ticker]['highest']
+    current_price = snapshot[ticker]['last']
+    lowest_estimate, highest_estimate = engine.interval(ticker)
 
     if current_price < lowest_estimate:
         return "BUY"
@@ -120,100 +61,100 @@ def generate_signal(session, ticker):
         return "HOLD"
 
 
-def generate_etf_arbitrage_signal(session):
-    """Generate buy/sell signal for the ETF based on the combined estimated fair value of UB and GEM."""
-    ub_price = get_last_price(session, 'UB')
-    gem_price = get_last_price(session, 'GEM')
-    etf_price = get_last_price(session, 'ETF')
-
-    # Check if price estimates for both UB and GEM are available
-    if price_estimates['UB']["pred"] is None or price_estimates['GEM']["pred"] is None:
-        # If estimates are missing, skip the arbitrage check and return "HOLD"
-        print("Insufficient data for arbitrage signal. Waiting for more news.")
-        return "HOLD"
-
-    # Combined fair value of UB and GEM based on their current estimates
-    combined_estimate = price_estimates['UB']["pred"] + price_estimates['GEM']["pred"]
-
-    if etf_price < combined_estimate:
-        return "BUY ETF, SELL UB and GEM"
-    elif etf_price > combined_estimate:
-        return "SELL ETF, BUY UB and GEM"
-    else:
+def generate_etf_arbitrage_signal(engine, snapshot, transaction_cost=TRANSACTION_COST):
+    """Generate buy/sell signal for the ETF when it trades outside the basket's fair value bounds net of costs."""
+    bounds = engine.bounds()
+    if bounds is None:
+        # Until every constituent has an estimate there is no fair value to compare with
+        log.debug('etf_signal_waiting')
         return "HOLD"
+    return engine.etf_signal(snapshot[TICKER_ETF]['last'], transaction_cost)
 
 
-def execute_trade(session, signal, ticker):
-    """Execute trade based on the signal for a specific ticker."""
-    quantity = INITIAL_ORDER_SIZE
-    price = get_last_price(session, ticker)
+def execute_trade(batch, snapshot, signal, ticker,
+                  quantity=INITIAL_ORDER_SIZE, transaction_cost=TRANSACTION_COST):
+    """Queue a trade for a specific ticker based on the signal; ``batch.flush`` sends it."""
+    price = snapshot[ticker]['last']
     if signal == "BUY":
-        submit_order(session, ticker, price + TRANSACTION_COST, quantity, 'BUY')
+        batch.add(ticker, 'BUY', quantity, price + transaction_cost)
     elif signal == "SELL":
-        submit_order(session, ticker, price - TRANSACTION_COST, quantity, 'SELL')
-
-
-def submit_order(session, ticker, price, quantity, side):
-    """Submit a buy or sell order with transaction cost consideration."""
-    quantity = min(quantity, 10000)  # Ensure order size does not exceed 10,000 shares
-    payload = {
-        'ticker': ticker,
-        'type': 'LIMIT',
-        'quantity': quantity,
-        'action': side,
-        'price': price
-    }
-    response = session.post(f'{API_URL}/orders', params=payload)
-    return response.json()
-
-
-def close_all_positions(session):
-    """Close out all positions at session end based on final prices."""
-    tickers = [TICKER_UB, TICKER_GEM, TICKER_ETF]
-    for ticker in tickers:
-        position = get_current_position(session, ticker)
-        if position > 0:
-            submit_order(session, ticker, get_last_price(session, ticker), position, 'SELL')
-        elif position < 0:
-            submit_order(session, ticker, get_last_price(session, ticker), abs(position), 'BUY')
+        batch.add(ticker, 'SELL', quantity, price - transaction_cost)
+
+
+@contextmanager
+def strategy(session, portfolio, order_size=INITIAL_ORDER_SIZE, transaction_cost=TRANSACTION_COST, limits=None,
+             weights=ETF_WEIGHTS, liquidation_tick=TIME_LIMIT):
+    """Set the news strategy up on a session and yield its (watchers, step, done) triple.
+
+    ``limits`` rate-limits order endpoints (see ``order_gateway.EndpointLimits``),
+    ``weights`` defines the ETF basket and ``liquidation_tick`` is where
+    flattening starts.
+    """
+    engine = FairValueEngine(weights)
+    tickers = (*engine.tickers, TICKER_ETF)
+    news_feed = NewsFeed(engine.tickers)
+    # Order responses go through the fill tracker, which passes them on to the portfolio
+    fills = FillTracker(session, portfolio)
+    batch = OrderBatch(session, fills, limits)
+    liquidator = Liquidator(session, tickers, liquidation_tick, portfolio=fills, limits=limits)
+
+    def trade(snapshot, signal, ticker, quantity=order_size):
+        execute_trade(batch, snapshot, signal, ticker, quantity, transaction_cost)
+
+    def step(state):
+        # Resting orders are the only ones whose fills are not known yet
+        fills.poll_orders()
+        if liquidator.active(state['tick']):
+            # No new trades near the session end; work every position down instead
+            liquidator.step(state['tick'])
+            return
+
+        # Only news newer than the last seen id is fetched and parsed
+        for ticker, final_estimate, elapsed_seconds in news_feed.poll(session):
+            update_price_estimates(engine, ticker, final_estimate, elapsed_seconds)
+
+        # One consistent set of prices for every decision in this tick
+        snapshot = get_price_snapshot(session, tickers)
+        for ticker in tickers:
+            fills.mark(ticker, snapshot[ticker]['last'])
+        realized, unrealized = fills.pnl()
+        log.debug('pnl', tick=state['tick'], realized=realized, unrealized=unrealized)
+
+        # Generate signals for each ticker
+        signals = {ticker: generate_signal(engine, snapshot, ticker) for ticker in engine.tickers}
+        etf_signal = generate_etf_arbitrage_signal(engine, snapshot, transaction_cost)
+        METRICS.decision()
+
+        # Execute trades based on signals
+        for ticker, signal in signals.items():
+            trade(snapshot, signal, ticker)
+
+        # ETF arbitrage: trade the ETF against its weighted basket
+        if etf_signal != "HOLD":
+            hedge = "SELL" if etf_signal == "BUY" else "BUY"
+            trade(snapshot, etf_signal, TICKER_ETF)
+            for ticker, weight in zip(engine.tickers, engine.weights):
+                trade(snapshot, hedge if weight > 0 else etf_signal, ticker, round(order_size * abs(weight)))
+
+        # Opposing intents on a ticker cancel out; the rest go out together
+        batch.flush()
+
+    # Re-run only on a new tick or a new news item, until positions are flat at the session end
+    watchers = {'tick': watch_tick(session), 'news': watch_news(session)}
+    yield watchers, step, lambda state: liquidator.flat
 
 
 def main():
-    with requests.Session() as session:
-        session.headers.update(API_KEY)
-        tick = get_tick(session)
-
-        while True:
-            if tick >= TIME_LIMIT:
-                close_all_positions(session)
-                break
-
-            news = get_news(session)
-            for item in news:
-                process_news_item(item)
-
-            # Generate signals for each ticker
-            ub_signal = generate_signal(session, 'UB')
-            gem_signal = generate_signal(session, 'GEM')
-            etf_signal = generate_etf_arbitrage_signal(session)
-
-            # Execute trades based on signals
-            execute_trade(session, ub_signal, 'UB')
-            execute_trade(session, gem_signal, 'GEM')
-
-            # Special case for ETF arbitrage
-            if etf_signal == "BUY ETF, SELL UB and GEM":
-                execute_trade(session, "BUY", TICKER_ETF)
-                execute_trade(session, "SELL", TICKER_UB)
-                execute_trade(session, "SELL", TICKER_GEM)
-            elif etf_signal == "SELL ETF, BUY UB and GEM":
-                execute_trade(session, "SELL", TICKER_ETF)
-                execute_trade(session, "BUY", TICKER_UB)
-                execute_trade(session, "BUY", TICKER_GEM)
-
-            # Sleep briefly to avoid too frequent API calls
-            time.sleep(1)
-            tick = get_tick(session)
+    weights = load_weights(BASKET_FILE) if os.path.exists(BASKET_FILE) else ETF_WEIGHTS
+    METRICS.start_exporter()
+    with InstrumentedSession() as session:
+        portfolio = PortfolioState(session).start()
+        try:
+            with strategy(session, portfolio, limits=EndpointLimits(), weights=weights) as (watchers, step, done):
+                Scheduler(watchers, metrics=METRICS).run(step, stop=done)
+        finally:
+            portfolio.stop()
+            METRICS.export()
 
 
 if __name__ == '__main__':
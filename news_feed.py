@@ -0,0 +1,67 @@
+import re
+
+from rit_config import API_URL
+
+# Precompiled parsers for the news body, e.g. "After 60 seconds, ... estimated to be $25.40"
+ELAPSED_PATTERN = re.compile(r'After (\d+) seconds')
+ESTIMATE_PATTERN = re.compile(r'\$\s*(\d+(?:\.\d+)?)')
+
+
+def parse_news_item(news_item, tickers):
+    """Return ``(ticker, final_estimate, elapsed_seconds)`` for a price news item, or None."""
+    headline = news_item['headline']
+    ticker = next((ticker for ticker in tickers if ticker in headline), None)
+    if ticker is None:
+        return None
+    body = news_item['body']
+    estimate = ESTIMATE_PATTERN.search(body)
+    elapsed = ELAPSED_PATTERN.search(body)
+    if estimate is None or elapsed is None:
+        return None
+    return ticker, float(estimate.group(1)), int(elapsed.group(1))
+
+
+class NewsFeed:
+    """Incremental news ingestion keyed on the highest news id seen so far.
+
+    Each ``poll`` asks RIT only for items newer than ``last_id``, parses them
+    once and appends the estimates to a per-ticker index, so the cost of a
+    poll depends on the number of new items rather than the size of the feed.
+    """
+
+    def __init__(self, tickers):
+        self.tickers = tuple(tickers)
+        self.last_id = 0
+        self.index = {ticker: [] for ticker in self.tickers}  # ticker -> [(news_id, final_estimate, elapsed_seconds)]
+
+    def fetch(self, session):
+        """Fetch the news items newer than ``last_id``, oldest first."""
+        response = session.get(f'{API_URL}/news', params={'since': self.last_id})
+        if response.status_code == 200:
+            news = [item for item in response.json() if item['news_id'] > self.last_id]
+            return sorted(news, key=lambda item: item['news_id'])
+        else:
+            raise Exception(f"Error fetching news: {response.status_code}")
+
+    def ingest(self, news):
+        """Index the given items and return the parsed estimates they contain."""
+        estimates = []
+        for item in news:
+            if item['news_id'] <= self.last_id:
+                continue
+            self.last_id = item['news_id']
+            parsed = parse_news_item(item, self.tickers)
+            if parsed is not None:
+                ticker, final_estimate, elapsed_seconds = parsed
+                self.index[ticker].append((item['news_id'], final_estimate, elapsed_seconds))
+                estimates.append(parsed)
+        return estimates
+
+    def poll(self, session):
+        """Fetch and ingest the new items; return the new ``(ticker, final_estimate, elapsed_seconds)`` estimates."""
+        return self.ingest(self.fetch(session))
+
+    def latest(self, ticker):
+        """Return the most recent ``(news_id, final_estimate, elapsed_seconds)`` for ``ticker``, or None."""
+        entries = self.index[ticker]
+        return entries[-1] if entries else None
@@ -0,0 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from metrics import log
+from rit_config import API_URL
+from scheduler import TokenBucket
+
+MAX_ORDER_SIZE = 10000  # Largest quantity the exchange accepts in one order
+SEND_WORKERS = 4  # Orders sent at the same time by one flush
+
+# Requests per second allowed on each order endpoint
+ENDPOINT_RATES = {
+    '/orders': 10,
+    '/commands/cancel': 5,
+}
+
+
+class EndpointLimits:
+    """One token bucket per endpoint, so orders cannot starve market data of its share of the API."""
+
+    def __init__(self, rates=ENDPOINT_RATES):
+        self.buckets = {path: TokenBucket(rate) for path, rate in rates.items()}
+
+    def acquire(self, url):
+        """Wait for a token on ``url``'s endpoint; endpoints without a rate are not limited."""
+        path = urlsplit(url).path
+        path = path[3:] if path.startswith('/v1') else path
+        bucket = self.buckets.get(path)
+        if bucket is not None:
+            bucket.acquire()
+
+
+def split_quantity(quantity, max_order_size=MAX_ORDER_SIZE):
+    """Split ``quantity`` into chunks no larger than ``max_order_size``."""
+    full, rest = divmod(int(quantity), max_order_size)
+    return [max_order_size] * full + ([rest] if rest else [])
+
+
+class OrderBatch:
+    """Collects the order intents of one tick and sends them as few, non-crossing orders.
+
+    Intents on the same ticker are netted: buying 5000 and selling 3000 UB in
+    the same pass becomes one 2000 share buy, and equal opposite intents send
+    nothing. A net order keeps the most aggressive limit of the intents on its
+    side and is split at ``max_order_size``. ``flush`` then sends the orders
+    concurrently, each taking a token from ``limits`` first, and applies the
+    responses to the portfolio.
+    """
+
+    def __init__(self, session, portfolio=None, limits=None, max_order_size=MAX_ORDER_SIZE, workers=SEND_WORKERS):
+        self.session = session
+        self.portfolio = portfolio
+        self.limits = limits
+        self.max_order_size = max_order_size
+        self.workers = workers
+        self.intents = {}  # ticker -> list of (action, quantity, price)
+
+    def add(self, ticker, action, quantity, price=None):
+        """Queue an intent; ``price=None`` sends a MARKET order."""
+        if quantity > 0:
+            self.intents.setdefault(ticker, []).append((action, quantity, price))
+
+    def net(self):
+        """Return the orders that the queued intents net out to, as request payloads."""
+        orders = []
+        for ticker, intents in self.intents.items():
+            net = sum(quantity if action == 'BUY' else -quantity for action, quantity, _ in intents)
+            if net == 0:
+                continue
+            action = 'BUY' if net > 0 else 'SELL'
+            prices = [price for side, _, price in intents if side == action]
+            if None in prices:
+                price = None
+            else:
+                price = max(prices) if action == 'BUY' else min(prices)
+            for quantity in split_quantity(abs(net), self.max_order_size):
+                payload = {'ticker': ticker, 'type': 'MARKET' if price is None else 'LIMIT',
+                           'quantity': quantity, 'action': action}
+                if price is not None:
+                    payload['price'] = price
+                orders.append(payload)
+        return orders
+
+    def flush(self):
+        """Send the netted orders concurrently and return their responses; the batch is emptied."""
+        orders = self.net()
+        queued = sum(len(intents) for intents in self.intents.values())
+        self.intents = {}
+        if not orders:
+            return []
+        log.debug('orders_netted', intents=queued, orders=len(orders))
+        if len(orders) == 1 or self.workers <= 1:
+            return [self._send(payload) for payload in orders]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(orders))) as executor:
+            return list(executor.map(self._send, orders))
+
+    def _send(self, payload):
+        url = f'{API_URL}/orders'
+        if self.limits is not None:
+            self.limits.acquire(url)
+        response = self.session.post(url, params=payload)
+        order = response.json()
+        if not response.ok:
+            log.error('order_rejected', ticker=payload['ticker'], action=payload['action'],
+                      quantity=payload['quantity'], status=response.status_code)
+        elif self.portfolio is not None:
+            self.portfolio.on_order(order)
+        return order
@@ -0,0 +1,121 @@
+import threading
+
+from metrics import log
+from rit_config import API_URL
+
+RECONCILE_INTERVAL = 2.0  # Seconds between background reconciliations against RIT
+
+
+class PortfolioState:
+    """In-process positions and open orders, indexed by ticker and order id.
+
+    Order responses are applied as they come back through ``on_order``, and a
+    background thread periodically replaces the whole state with what
+    ``/securities`` and ``/orders`` report, which corrects any drift. Reads
+    never touch the network.
+    """
+
+    def __init__(self, session, interval=RECONCILE_INTERVAL):
+        self.session = session
+        self.interval = interval
+        self.positions = {}  # ticker -> position
+        self.orders = {}  # order_id -> open order
+        self.orders_by_ticker = {}  # ticker -> {order_id: open order}
+        self.filled = {}  # order_id -> quantity already applied to positions
+        self.settled = set()  # ids of orders closed by the time of a reconcile; their fills are in positions
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def position(self, ticker):
+        """Return the current position in ``ticker``."""
+        return self.positions.get(ticker, 0)
+
+    def open_orders(self, ticker=None):
+        """Return the open orders, for one ticker or for all of them."""
+        with self.lock:
+            if ticker is None:
+                return list(self.orders.values())
+            return list(self.orders_by_ticker.get(ticker, {}).values())
+
+    def on_order(self, order):
+        """Apply an order as returned by ``POST /orders`` or ``GET /orders/{id}``."""
+        order_id = order.get('order_id')
+        if order_id is None:
+            return
+        ticker = order['ticker']
+        with self.lock:
+            if order_id in self.settled:
+                # Reported after a reconcile that already counted all of its fills
+                self._forget(order_id)
+                return
+            filled = order.get('quantity_filled', 0)
+            delta = filled - self.filled.get(order_id, 0)
+            if delta:
+                sign = 1 if order['action'] == 'BUY' else -1
+                self.positions[ticker] = self.positions.get(ticker, 0) + sign * delta
+            self.filled[order_id] = filled
+            if order.get('status') == 'OPEN':
+                self.orders[order_id] = order
+                self.orders_by_ticker.setdefault(ticker, {})[order_id] = order
+            else:
+                self._forget(order_id)
+
+    def on_cancel(self, order_id=None):
+        """Drop one cancelled order, or every open order when ``order_id`` is None."""
+        with self.lock:
+            if order_id is None:
+                self.orders.clear()
+                self.orders_by_ticker.clear()
+            else:
+                self._forget(order_id)
+
+    def _forget(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self.orders_by_ticker.get(order['ticker'], {}).pop(order_id, None)
+
+    def reconcile(self):
+        """Replace positions and open orders with the state reported by RIT."""
+        response = self.session.get(f'{API_URL}/securities')
+        if response.status_code != 200:
+            raise Exception(f"Error fetching positions: {response.status_code}")
+        securities = response.json()
+        response = self.session.get(f'{API_URL}/orders', params={'status': 'OPEN'})
+        if response.status_code != 200:
+            raise Exception(f"Error fetching open orders: {response.status_code}")
+        open_orders = response.json()
+
+        with self.lock:
+            # Orders known before but no longer open are fully reflected in the positions below
+            open_ids = {order['order_id'] for order in open_orders}
+            self.settled.update(order_id for order_id in self.filled if order_id not in open_ids)
+            self.settled.update(order_id for order_id in self.orders if order_id not in open_ids)
+            self.positions = {stock['ticker']: stock.get('position', 0) for stock in securities}
+            self.orders = {order['order_id']: order for order in open_orders}
+            self.orders_by_ticker = {}
+            for order_id, order in self.orders.items():
+                self.orders_by_ticker.setdefault(order['ticker'], {})[order_id] = order
+            self.filled = {order_id: order.get('quantity_filled', 0) for order_id, order in self.orders.items()}
+
+    def start(self):
+        """Reconcile once now, then every ``interval`` seconds on a daemon thread."""
+        self.reconcile()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background reconciliation."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.reconcile()
+            except Exception as e:
+                log.error('reconcile_failed', error=str(e))
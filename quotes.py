@@ -0,0 +1,110 @@
+from metrics import log
+from rit_config import API_URL
+
+PRICE_TOLERANCE = 0.005  # Resting orders within this distance of the target price are kept
+PRICE_INCREMENT = 0.01  # Smallest price step; quotes never cross the opposite best by less
+LOT_SIZE = 100  # Quote sizes are rounded down to whole lots
+IMBALANCE_LEVELS = 3  # Book levels per side counted in the order-book imbalance
+IMBALANCE_WEIGHT = 0.5  # Fraction of the market half-spread the fair price leans towards the heavier side
+INVENTORY_SKEW = 1.0  # Half-widths the quotes shift against a full position
+
+
+def book_imbalance(book, levels=IMBALANCE_LEVELS):
+    """Return ``(bid_volume - ask_volume) / total`` over the top ``levels`` of each side, in [-1, 1]."""
+    bid_volume = sum(level['quantity'] - level.get('quantity_filled', 0) for level in book['bids'][:levels])
+    ask_volume = sum(level['quantity'] - level.get('quantity_filled', 0) for level in book['asks'][:levels])
+    total = bid_volume + ask_volume
+    return (bid_volume - ask_volume) / total if total else 0.0
+
+
+def skewed_quotes(book, position, max_position, max_order_size, half_width,
+                  inventory_skew=INVENTORY_SKEW, imbalance_weight=IMBALANCE_WEIGHT):
+    """Return ``(bid, ask)`` quotes, each a ``(price, quantity)`` pair or None, from the live book and inventory.
+
+    The fair price is the mid leaned towards the heavier side of the book by
+    the imbalance. Both quotes sit ``half_width`` around it, shifted against
+    the inventory so that a long position quotes a cheaper ask and a lower
+    bid. Sizes shrink linearly on the side that would grow the position and
+    never exceed the room left under ``max_position``. Neither quote crosses
+    the opposite best price.
+    """
+    if not book['bids'] or not book['asks']:
+        return None, None
+    best_bid, best_ask = book['bids'][0]['price'], book['asks'][0]['price']
+    mid = (best_bid + best_ask) / 2
+    fair = mid + imbalance_weight * book_imbalance(book) * (best_ask - best_bid) / 2
+
+    inventory = max(-1.0, min(1.0, position / max_position))
+    reservation = fair - inventory_skew * inventory * half_width
+    bid_price = min(reservation - half_width, best_ask - PRICE_INCREMENT)
+    ask_price = max(reservation + half_width, best_bid + PRICE_INCREMENT)
+
+    bid_size = min(max_order_size * (1 - inventory), max_order_size, max_position - position)
+    ask_size = min(max_order_size * (1 + inventory), max_order_size, max_position + position)
+    bid_size = int(bid_size // LOT_SIZE * LOT_SIZE)
+    ask_size = int(ask_size // LOT_SIZE * LOT_SIZE)
+    return ((bid_price, bid_size) if bid_size > 0 else None,
+            (ask_price, ask_size) if ask_size > 0 else None)
+
+
+class QuoteManager:
+    """Keep one resting LIMIT order per side of ``ticker`` in line with the desired quotes.
+
+    Each ``update`` compares the desired bid and ask with the open orders held
+    in ``portfolio``: a correctly priced order is left in place to keep its
+    queue priority, stale or duplicate orders are cancelled one by one, and a
+    new order is sent only for a side that has nothing resting at the target.
+    """
+
+    def __init__(self, session, portfolio, ticker, tolerance=PRICE_TOLERANCE):
+        self.session = session
+        self.portfolio = portfolio
+        self.ticker = ticker
+        self.tolerance = tolerance
+
+    def update(self, bid=None, ask=None):
+        """Move resting orders to ``bid``/``ask``, each a ``(price, quantity)`` pair or None to pull that side."""
+        resting = self.portfolio.open_orders(self.ticker)
+        for side, target in (('BUY', bid), ('SELL', ask)):
+            kept = False
+            for order in resting:
+                if order['action'] != side:
+                    continue
+                if not kept and target is not None and abs(order['price'] - target[0]) <= self.tolerance:
+                    kept = True
+                else:
+                    self.cancel(order['order_id'])
+            if not kept and target is not None and target[1] > 0:
+                self.submit(side, *target)
+
+    def cancel(self, order_id):
+        """Cancel a single order.
+
+        A cancel fails when the order already filled or was cancelled. Its
+        current state is then fetched and applied, so the cache stops showing
+        it as resting and the side is re-quoted right away.
+        """
+        response = self.session.delete(f'{API_URL}/orders/{order_id}')
+        if response.ok:
+            self.portfolio.on_cancel(order_id)
+            return
+        log.warning('cancel_failed', order_id=order_id, status=response.status_code)
+        response = self.session.get(f'{API_URL}/orders/{order_id}')
+        if response.status_code == 200:
+            self.portfolio.on_order(response.json())
+        else:
+            self.portfolio.on_cancel(order_id)
+
+    def submit(self, side, price, quantity):
+        """Submit a LIMIT order and record it in the portfolio."""
+        payload = {
+            'ticker': self.ticker,
+            'type': 'LIMIT',
+            'quantity': quantity,
+            'action': side,
+            'price': round(price, 2),
+        }
+        response = self.session.post(f'{API_URL}/orders', params=payload)
+        order = response.json()
+        self.portfolio.on_order(order)
+        return order
@@ -0,0 +1,315 @@
+import argparse
+import os
+import threading
+
+import numpy as np
+
+from metrics import InstrumentedSession, log
+from mock_rit import save_case
+from rit_config import API_URL
+
+RECORD_DIR = 'recordings'  # Where recordings are written by default
+RECORD_INTERVAL = 0.25  # Seconds between checks for a new tick
+BOOK_DEPTH = 10  # Levels recorded on each side of every book
+
+SIDES = {'bids': 1, 'asks': -1}
+ACTIONS = {'BUY': 1, 'SELL': -1}
+
+# Column dtypes of each table; every column is its own append-only file
+SCHEMAS = {
+    'books': {'tick': '<i4', 'ticker': 'S8', 'side': 'i1', 'level': 'i1', 'price': '<f8', 'quantity': '<f8'},
+    'bars': {'tick': '<i4', 'ticker': 'S8', 'open': '<f8', 'high': '<f8', 'low': '<f8', 'close': '<f8'},
+    'news': {'news_id': '<i4', 'tick': '<i4', 'ticker': 'S8', 'offset': '<i8', 'headline_length': '<i4',
+             'body_length': '<i4'},
+    'orders': {'tick': '<i4', 'order_id': '<i8', 'ticker': 'S8', 'action': 'i1', 'price': '<f8',
+               'quantity': '<f8', 'quantity_filled': '<f8', 'vwap': '<f8', 'status': 'S10'},
+}
+
+
+class ColumnTable:
+    """A table stored as one raw binary file per column.
+
+    Rows are only ever appended, so writing is a ``tobytes`` per column and
+    reading memory-maps each file without copying. The row count is taken
+    from the shortest column, which hides a row whose append was cut short.
+    """
+
+    def __init__(self, directory, schema):
+        self.directory = directory
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in schema.items()}
+        os.makedirs(directory, exist_ok=True)
+        self._files = None
+
+    def path(self, column):
+        return os.path.join(self.directory, f'{column}.bin')
+
+    def append(self, rows):
+        """Append ``rows``, a dict of equally long column sequences."""
+        if self._files is None:
+            self._files = {name: open(self.path(name), 'ab') for name in self.dtypes}
+        for name, dtype in self.dtypes.items():
+            self._files[name].write(np.asarray(rows[name], dtype=dtype).tobytes())
+
+    def flush(self):
+        if self._files is not None:
+            for f in self._files.values():
+                f.flush()
+
+    def close(self):
+        if self._files is not None:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+
+    def __len__(self):
+        return min((os.path.getsize(self.path(name)) // dtype.itemsize if os.path.exists(self.path(name)) else 0)
+                   for name, dtype in self.dtypes.items())
+
+    def read(self):
+        """Return ``{column: array}`` with every column memory-mapped read-only."""
+        rows = len(self)
+        if rows == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in self.dtypes.items()}
+        return {name: np.memmap(self.path(name), dtype=dtype, mode='r', shape=(rows,))
+                for name, dtype in self.dtypes.items()}
+
+
+class TickStore:
+    """A recording directory: the books, bars, news and orders tables plus the news text."""
+
+    def __init__(self, directory=RECORD_DIR):
+        self.directory = directory
+        self.tables = {name: ColumnTable(os.path.join(directory, name), schema) for name, schema in SCHEMAS.items()}
+        self.text_path = os.path.join(directory, 'news', 'text.bin')
+        self._text = None
+
+    def append(self, table, rows):
+        self.tables[table].append(rows)
+
+    def append_text(self, text):
+        """Append news text and return the offset it was written at."""
+        if self._text is None:
+            self._text = open(self.text_path, 'ab')
+        offset = self._text.tell()
+        self._text.write(text)
+        return offset
+
+    def flush(self):
+        for table in self.tables.values():
+            table.flush()
+        if self._text is not None:
+            self._text.flush()
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        if self._text is not None:
+            self._text.close()
+            self._text = None
+
+    # Reading
+
+    def books(self):
+        return self.tables['books'].read()
+
+    def bars(self):
+        return self.tables['bars'].read()
+
+    def news(self):
+        return self.tables['news'].read()
+
+    def orders(self):
+        return self.tables['orders'].read()
+
+    def news_text(self, index):
+        """Return ``(headline, body)`` of the news row at ``index``."""
+        news = self.news()
+        text = np.memmap(self.text_path, dtype=np.uint8, mode='r')
+        start = int(news['offset'][index])
+        middle = start + int(news['headline_length'][index])
+        end = middle + int(news['body_length'][index])
+        return bytes(text[start:middle]).decode(), bytes(text[middle:end]).decode()
+
+    def closes(self, ticker):
+        """Return ``(ticks, closes)`` of the recorded bars of ``ticker``."""
+        bars = self.bars()
+        mask = bars['ticker'] == ticker.encode()
+        return bars['tick'][mask], bars['close'][mask]
+
+    def to_case(self):
+        """Turn the recording into a case ``mock_rit.MockRIT`` can replay."""
+        bars = self.bars()
+        ticks = int(bars['tick'].max()) if len(bars['tick']) else 0
+        prices = {}
+        for ticker in np.unique(bars['ticker']):
+            tick, close = self.closes(ticker.decode())
+            path = np.full(ticks, np.nan)
+            path[tick - 1] = close
+            # Carry the last close over ticks that were not recorded
+            filled = np.maximum.accumulate(np.where(np.isnan(path), 0, np.arange(ticks)))
+            path = path[filled]
+            path[np.isnan(path)] = close[0]
+            prices[ticker.decode()] = path.tolist()
+        news = self.news()
+        items = []
+        for index in range(len(news['news_id'])):
+            headline, body = self.news_text(index)
+            items.append({'news_id': int(news['news_id'][index]), 'period': 1, 'tick': int(news['tick'][index]),
+                          'ticker': news['ticker'][index].decode(), 'headline': headline, 'body': body})
+        return {'ticks': ticks, 'prices': prices, 'news': items}
+
+
+class TickRecorder:
+    """Records every book, bar, news item and order of ours once per tick on a daemon thread.
+
+    Each new tick costs one ``/case`` call, a book and a history call per
+    ticker, one ``/news`` call from the last seen id and one
+    ``/orders?status=OPEN`` call. Orders are recorded every tick while open
+    and once more in their final state, fetched by id on the tick they leave
+    the open list. An order that filled in full before it was ever seen open
+    is not recorded.
+    """
+
+    def __init__(self, session, store, tickers=None, interval=RECORD_INTERVAL, depth=BOOK_DEPTH):
+        self.session = session
+        self.store = store
+        self.tickers = tickers
+        self.interval = interval
+        self.depth = depth
+        self.last_tick = 0
+        self.last_news_id = 0
+        self.open_orders = set()  # ids of orders recorded as open on the last recorded tick
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _get(self, path, params=None):
+        response = self.session.get(f'{API_URL}{path}', params=params)
+        if response.status_code != 200:
+            raise Exception(f"Error fetching {path}: {response.status_code}")
+        return response.json()
+
+    def record(self):
+        """Record the current tick if it has not been recorded yet; return whether it was."""
+        tick = self._get('/case')['tick']
+        if tick == self.last_tick:
+            return False
+        if self.tickers is None:
+            self.tickers = [stock['ticker'] for stock in self._get('/securities')]
+        self._record_books(tick)
+        self._record_bars(tick)
+        self._record_news()
+        self._record_orders(tick)
+        self.store.flush()
+        self.last_tick = tick
+        return True
+
+    def _record_books(self, tick):
+        rows = {name: [] for name in SCHEMAS['books']}
+        for ticker in self.tickers:
+            book = self._get('/securities/book', {'ticker': ticker, 'limit': self.depth})
+            for side, sign in SIDES.items():
+                for level, entry in enumerate(book[side]):
+                    rows['tick'].append(tick)
+                    rows['ticker'].append(ticker)
+                    rows['side'].append(sign)
+                    rows['level'].append(level)
+                    rows['price'].append(entry['price'])
+                    rows['quantity'].append(entry['quantity'] - entry.get('quantity_filled', 0))
+        self.store.append('books', rows)
+
+    def _record_bars(self, tick):
+        rows = {name: [] for name in SCHEMAS['bars']}
+        for ticker in self.tickers:
+            history = self._get('/securities/history', {'ticker': ticker, 'limit': tick - self.last_tick + 1})
+            for bar in reversed(history):
+                # Only completed bars: the current tick's bar is recorded on the next recorded tick
+                if self.last_tick <= bar['tick'] < tick:
+                    rows['ticker'].append(ticker)
+                    for name in ('tick', 'open', 'high', 'low', 'close'):
+                        rows[name].append(bar[name])
+        self.store.append('bars', rows)
+
+    def _record_news(self):
+        rows = {name: [] for name in SCHEMAS['news']}
+        for item in sorted(self._get('/news', {'since': self.last_news_id}), key=lambda item: item['news_id']):
+            headline, body = item.get('headline', '').encode(), item.get('body', '').encode()
+            rows['news_id'].append(item['news_id'])
+            rows['tick'].append(item['tick'])
+            rows['ticker'].append(item.get('ticker', ''))
+            rows['offset'].append(self.store.append_text(headline + body))
+            rows['headline_length'].append(len(headline))
+            rows['body_length'].append(len(body))
+            self.last_news_id = max(self.last_news_id, item['news_id'])
+        self.store.append('news', rows)
+
+    def _record_orders(self, tick):
+        orders = self._get('/orders', {'status': 'OPEN'})
+        open_orders = {order['order_id'] for order in orders}
+        for order_id in self.open_orders - open_orders:
+            # Left the open list since the last tick: record its final state once
+            response = self.session.get(f'{API_URL}/orders/{order_id}')
+            if response.status_code == 200:
+                orders.append(response.json())
+            elif response.status_code != 404:
+                log.warning('order_status_failed', order_id=order_id, status=response.status_code)
+                open_orders.add(order_id)  # retried on the next tick
+        self.open_orders = open_orders
+        rows = {name: [] for name in SCHEMAS['orders']}
+        for order in orders:
+            rows['tick'].append(tick)
+            rows['order_id'].append(order['order_id'])
+            rows['ticker'].append(order['ticker'])
+            rows['action'].append(ACTIONS[order['action']])
+            rows['price'].append(np.nan if order.get('price') is None else order['price'])
+            rows['quantity'].append(order['quantity'])
+            rows['quantity_filled'].append(order.get('quantity_filled', 0))
+            rows['vwap'].append(np.nan if order.get('vwap') is None else order['vwap'])
+            rows['status'].append(order['status'])
+        self.store.append('orders', rows)
+
+    def start(self):
+        """Record on a daemon thread until ``stop``."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop recording and close the store's files."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.store.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.record()
+            except Exception as e:
+                log.error('record_failed', error=str(e))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record RIT market data, or export a recording as a replayable case.")
+    parser.add_argument('--dir', default=RECORD_DIR, help="recording directory")
+    parser.add_argument('--tickers', nargs='*', help="tickers to record (default: every security)")
+    parser.add_argument('--export', metavar='CASE', help="write the recording as a case file for backtest.py --case")
+    args = parser.parse_args()
+
+    store = TickStore(args.dir)
+    if args.export:
+        save_case(store.to_case(), args.export)
+        return
+    with InstrumentedSession() as session:
+        recorder = TickRecorder(session, store, args.tickers).start()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            recorder.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rit_config import API_KEY, API_URL
+
+# Number of keep-alive sockets kept open to the RIT client
+POOL_SIZE = 4
+
+
+class ApiException(Exception):
+    pass
+
+
+def pooled_session(pool_size=POOL_SIZE, session=None):
+    """Give ``session`` (a new one by default) a single host pool of keep-alive connections to the RIT client."""
+    if session is None:
+        session = requests.Session()
+        session.headers.update(API_KEY)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+    session.mount('http://', adapter)
+    return session
+
+
+class AsyncRIT:
+    """Asyncio client for the RIT REST API.
+
+    Requests go through one pooled ``requests.Session`` and are run on a small
+    thread pool, so several calls can be in flight at the same moment and
+    awaited together with ``asyncio.gather``.
+    """
+
+    def __init__(self, session=None, api_url=API_URL, pool_size=POOL_SIZE):
+        self.session = session if session is not None else pooled_session(pool_size)
+        self.api_url = api_url
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the worker threads and the pooled connections."""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    async def request(self, method, path, params=None):
+        """Run a single HTTP request on the pool and return the response."""
+        loop = asyncio.get_running_loop()
+        url = f'{self.api_url}{path}'
+        return await loop.run_in_executor(
+            self._executor, lambda: self.session.request(method, url, params=params))
+
+    async def get(self, path, params=None):
+        return await self.request('GET', path, params)
+
+    async def post(self, path, params=None):
+        return await self.request('POST', path, params)
+
+    async def delete(self, path, params=None):
+        return await self.request('DELETE', path, params)
+
+    async def get_tick(self):
+        """Fetch the current tick of the running case."""
+        resp = await self.get('/case')
+        if resp.ok:
+            return resp.json()['tick']
+        raise ApiException('The API key provided in this Python code must match that in the RIT client')
+
+    async def get_book(self, ticker):
+        """Fetch the order book for a single ticker."""
+        resp = await self.get('/securities/book', {'ticker': ticker})
+        if resp.ok:
+            return resp.json()
+        raise ApiException(f'Error fetching order book for ticker {ticker}')
+
+    async def get_books(self, tickers):
+        """Fetch the order books for several tickers at the same moment."""
+        books = await asyncio.gather(*(self.get_book(ticker) for ticker in tickers))
+        return dict(zip(tickers, books))
+
+    async def get_order(self, order_id):
+        """Fetch the current state of one order."""
+        resp = await self.get(f'/orders/{order_id}')
+        if resp.ok:
+            return resp.json()
+        raise ApiException(f'Error fetching order {order_id}')
+
+    async def cancel_order(self, order_id):
+        """Cancel one order and return the response."""
+        return await self.delete(f'/orders/{order_id}')
+
+    async def submit_order(self, ticker, action, quantity, order_type='MARKET', price=None):
+        """Submit one order and return the response."""
+        order_data = {
+            'ticker': ticker,
+            'type': order_type,
+            'action': action.upper(),
+            'quantity': quantity,
+        }
+        if price is not None:
+            order_data['price'] = price
+        return await self.post('/orders', order_data)
+
+    async def submit_orders(self, orders):
+        """Submit several orders concurrently; ``orders`` holds ``submit_order`` argument tuples."""
+        return await asyncio.gather(*(self.submit_order(*order) for order in orders))
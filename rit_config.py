@@ -0,0 +1,3 @@
+# API Key and Base URL shared by every module that talks to the RIT client
+API_KEY = {'X-API-Key': 'II679A88'}  # Replace with your actual API key
+API_URL = "http://localhost:9999/v1"
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+
+from depth import plan_arbitrage
+
+
+def load_config(path):
+    """Load a ``{underlying: [venue ticker, ...]}`` mapping of cross-listed tickers from JSON."""
+    with open(path) as f:
+        return json.load(f)
+
+
+async def fetch_books(client, config):
+    """Fetch the books of every venue in ``config`` concurrently."""
+    return await client.get_books([ticker for venues in config.values() for ticker in venues])
+
+
+def top_of_book(config, books):
+    """Return ``(bids, asks)`` arrays of shape ``(underlyings, venues)``; missing quotes are NaN."""
+    width = max(len(venues) for venues in config.values())
+    bids = np.full((len(config), width), np.nan)
+    asks = np.full((len(config), width), np.nan)
+    for row, venues in enumerate(config.values()):
+        for column, ticker in enumerate(venues):
+            book = books[ticker]
+            if book['bids']:
+                bids[row, column] = book['bids'][0]['price']
+            if book['asks']:
+                asks[row, column] = book['asks'][0]['price']
+    return bids, asks
+
+
+def find_opportunities(config, books, cost_per_share=0.0):
+    """List every crossed venue pair as ``(edge, underlying, buy_ticker, sell_ticker)``, widest first.
+
+    The edge of buying on venue ``i`` and selling on venue ``j`` is computed for
+    all underlyings and venue pairs at once as ``bid[j] - ask[i]``.
+    """
+    bids, asks = top_of_book(config, books)
+    edge = bids[:, None, :] - asks[:, :, None] - cost_per_share
+    diagonal = np.arange(edge.shape[1])
+    edge[:, diagonal, diagonal] = np.nan
+    rows, buys, sells = np.nonzero(edge > 0)
+    order = np.argsort(-edge[rows, buys, sells])
+    underlyings = list(config)
+    opportunities = []
+    for k in order:
+        underlying = underlyings[rows[k]]
+        venues = config[underlying]
+        opportunities.append((float(edge[rows[k], buys[k], sells[k]]), underlying,
+                              venues[buys[k]], venues[sells[k]]))
+    return opportunities
+
+
+def plan_trades(config, books, budget, max_order_size, cost_per_share=0.0):
+    """Size every opportunity by book depth and pick the most profitable ones that fit.
+
+    Plans are taken in order of expected P&L. Each one reserves its quantity
+    from the shared ``budget``, and a venue's book side is used by at most one
+    plan per scan because the depth behind it was already counted.
+    """
+    plans = []
+    for _, underlying, buy_ticker, sell_ticker in find_opportunities(config, books, cost_per_share):
+        plan = plan_arbitrage(books[buy_ticker]['asks'], books[sell_ticker]['bids'],
+                              cost_per_share, max_quantity=max_order_size)
+        if plan['quantity'] > 0:
+            plans.append(dict(plan, underlying=underlying, buy_ticker=buy_ticker, sell_ticker=sell_ticker))
+    plans.sort(key=lambda plan: plan['expected_pnl'], reverse=True)
+
+    selected, used = [], set()
+    for plan in plans:
+        if budget <= 0:
+            break
+        sides = {(plan['buy_ticker'], 'asks'), (plan['sell_ticker'], 'bids')}
+        if sides & used:
+            continue
+        if plan['quantity'] > budget:
+            plan = dict(plan_arbitrage(books[plan['buy_ticker']]['asks'], books[plan['sell_ticker']]['bids'],
+                                       cost_per_share, max_quantity=budget),
+                        underlying=plan['underlying'], buy_ticker=plan['buy_ticker'], sell_ticker=plan['sell_ticker'])
+        used |= sides
+        budget -= plan['quantity']
+        selected.append(plan)
+    return selected
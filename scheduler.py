@@ -0,0 +1,130 @@
+import threading
+import time
+
+import requests
+
+from rit_config import API_KEY, API_URL
+
+# Polling parameters
+MAX_REQUESTS_PER_SECOND = 25  # Hard cap on API calls from one session
+MIN_INTERVAL = 0.05  # Poll interval right after an input changed
+MAX_INTERVAL = 1.0  # Poll interval once inputs have been quiet for a while
+BACKOFF = 2.0  # Growth factor of the poll interval while nothing changes
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is available."""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = burst if burst is not None else rate
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take ``tokens`` from the bucket, sleeping until they have been refilled."""
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+class ThrottledSession(requests.Session):
+    """``requests.Session`` with the API key set and every request passed through a token bucket."""
+
+    def __init__(self, max_rps=MAX_REQUESTS_PER_SECOND):
+        super().__init__()
+        self.headers.update(API_KEY)
+        self.limiter = TokenBucket(max_rps)
+
+    def request(self, *args, **kwargs):
+        self.limiter.acquire()
+        return super().request(*args, **kwargs)
+
+
+def watch_tick(session):
+    """Return a watcher yielding the current tick from ``/case``."""
+    def watch():
+        response = session.get(f'{API_URL}/case')
+        if response.status_code == 200:
+            return response.json()['tick']
+        raise Exception(f"Error fetching tick data: {response.status_code}")
+    return watch
+
+
+def watch_book(session, ticker):
+    """Return a watcher yielding the top level of ``ticker``'s order book."""
+    def watch():
+        response = session.get(f'{API_URL}/securities/book', params={'ticker': ticker, 'limit': 1})
+        if response.status_code == 200:
+            book = response.json()
+            bid = book['bids'][0] if book['bids'] else {}
+            ask = book['asks'][0] if book['asks'] else {}
+            return bid.get('price'), bid.get('quantity'), ask.get('price'), ask.get('quantity')
+        raise Exception(f"Error fetching book for {ticker}: {response.status_code}")
+    return watch
+
+
+def watch_news(session):
+    """Return a watcher yielding the id of the newest news item."""
+    def watch():
+        response = session.get(f'{API_URL}/news', params={'limit': 1})
+        if response.status_code == 200:
+            news = response.json()
+            return news[0]['news_id'] if news else None
+        raise Exception(f"Error fetching news: {response.status_code}")
+    return watch
+
+
+class Scheduler:
+    """Run a strategy step only when one of its watched inputs has changed.
+
+    ``watchers`` maps a name to a zero-argument callable; the dict of their
+    latest values is passed to ``step`` and ``stop``. While nothing changes the
+    poll interval grows by ``backoff`` up to ``max_interval`` and it drops back
+    to ``min_interval`` as soon as something does. With ``metrics`` set, each
+    change starts a tick timing and each step's duration is recorded.
+    """
+
+    def __init__(self, watchers, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 backoff=BACKOFF, sleep=time.sleep, metrics=None):
+        self.watchers = watchers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.sleep = sleep
+        self.metrics = metrics
+        self.interval = min_interval
+        self.state = None
+
+    def poll(self):
+        """Read every watcher and return the new state."""
+        return {name: watch() for name, watch in self.watchers.items()}
+
+    def run(self, step, stop=None):
+        """Loop until ``stop(state)`` is true, calling ``step(state)`` on every change; return the last state."""
+        while True:
+            state = self.poll()
+            if stop is not None and stop(state):
+                return state
+            if state != self.state:
+                self.state = state
+                if self.metrics is not None:
+                    self.metrics.start_tick()
+                start = time.perf_counter()
+                step(state)
+                if self.metrics is not None:
+                    self.metrics.end_step(time.perf_counter() - start)
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+            self.sleep(self.interval)
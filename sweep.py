@@ -0,0 +1,168 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backtest import STRATEGIES, run_case
+from mock_rit import synthetic_case
+
+# Market data shared by the worker processes, opened once per process
+_data = None
+
+
+def prepare_data(directory, cases):
+    """Store cases as one ``(n_cases, ticks)`` price array per ticker plus a news file."""
+    os.makedirs(directory, exist_ok=True)
+    tickers = sorted(cases[0]['prices'])
+    for ticker in tickers:
+        prices = np.array([case['prices'][ticker] for case in cases], dtype=np.float64)
+        np.save(os.path.join(directory, f'prices_{ticker}.npy'), prices)
+    with open(os.path.join(directory, 'news.json'), 'w') as f:
+        json.dump({'tickers': tickers, 'ticks': cases[0]['ticks'], 'news': [case['news'] for case in cases]}, f)
+
+
+def open_data(directory):
+    """Open stored market data; price arrays are memory-mapped read-only, so processes share the pages."""
+    with open(os.path.join(directory, 'news.json')) as f:
+        meta = json.load(f)
+    prices = {ticker: np.load(os.path.join(directory, f'prices_{ticker}.npy'), mmap_mode='r')
+              for ticker in meta['tickers']}
+    return {'ticks': meta['ticks'], 'prices': prices, 'news': meta['news']}
+
+
+def load_case(data, index):
+    """Build the case at ``index`` from opened market data."""
+    return {
+        'ticks': data['ticks'],
+        'prices': {ticker: prices[index].tolist() for ticker, prices in data['prices'].items()},
+        'news': data['news'][index],
+    }
+
+
+def grid(axes):
+    """Every combination of the values in ``axes`` (param -> list of values)."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def random_search(space, n, seed=0):
+    """``n`` random parameter sets; ``space`` maps a param to a ``(low, high)`` range or a list of choices."""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(n):
+        params = {}
+        for name, choices in space.items():
+            if isinstance(choices, tuple):
+                low, high = choices
+                params[name] = rng.randint(low, high) if isinstance(low, int) else rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(choices)
+        samples.append(params)
+    return samples
+
+
+def _init_worker(directory):
+    global _data
+    _data = open_data(directory)
+
+
+def _run(task):
+    strategy, params, index = task
+    return params, run_case(strategy, load_case(_data, index), params)
+
+
+def summarize(params, results):
+    """Aggregate the per-case results of one parameter set."""
+    pnl = [result['pnl'] for result in results]
+    return dict(params,
+                mean_pnl=statistics.mean(pnl),
+                stdev_pnl=statistics.pstdev(pnl),
+                worst_pnl=min(pnl),
+                mean_drawdown=statistics.mean(result['max_drawdown'] for result in results),
+                max_drawdown=max(result['max_drawdown'] for result in results),
+                mean_fills=statistics.mean(result['fills'] for result in results),
+                mean_volume=statistics.mean(result['volume'] for result in results),
+                cases=len(results))
+
+
+def sweep(strategy, param_sets, directory, workers=None):
+    """Backtest every parameter set on every stored case and return summaries ranked by mean P&L."""
+    n_cases = len(open_data(directory)['news'])
+    tasks = [(strategy, params, index) for params in param_sets for index in range(n_cases)]
+    by_params = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(directory,)) as pool:
+        chunksize = max(1, len(tasks) // ((workers or os.cpu_count()) * 4))
+        for params, result in pool.map(_run, tasks, chunksize=chunksize):
+            by_params.setdefault(json.dumps(params, sort_keys=True), (params, []))[1].append(result)
+    summaries = [summarize(params, results) for params, results in by_params.values()]
+    return sorted(summaries, key=lambda summary: summary['mean_pnl'], reverse=True)
+
+
+def write_results(summaries, path):
+    """Write ranked summaries to a CSV file."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['rank'] + list(summaries[0]))
+        writer.writeheader()
+        for rank, summary in enumerate(summaries, 1):
+            writer.writerow(dict(summary, rank=rank))
+
+
+def _value(text):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _parse_axes(specs):
+    """Parse ``name=v1,v2,...`` into choices and ``name=low:high`` into ranges."""
+    axes = {}
+    for spec in specs:
+        name, values = spec.split('=', 1)
+        if ':' in values:
+            low, high = values.split(':', 1)
+            axes[name] = (_value(low), _value(high))
+        else:
+            axes[name] = [_value(value) for value in values.split(',')]
+    return axes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over the backtest.")
+    parser.add_argument('strategy', choices=STRATEGIES)
+    parser.add_argument('params', nargs='+', help="name=v1,v2 (grid values) or name=low:high (random range)")
+    parser.add_argument('--data', default='sweep_data', help="directory holding the market data")
+    parser.add_argument('--cases', type=int, default=20, help="synthetic cases to generate if --data is empty")
+    parser.add_argument('--random', type=int, help="sample this many random parameter sets instead of a grid")
+    parser.add_argument('--workers', type=int, help="worker processes (default: all cores)")
+    parser.add_argument('--out', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.data, 'news.json')):
+        prepare_data(args.data, [synthetic_case(seed) for seed in range(args.cases)])
+
+    axes = _parse_axes(args.params)
+    param_sets = random_search(axes, args.random) if args.random else grid(axes)
+
+    start = time.perf_counter()
+    summaries = sweep(args.strategy, param_sets, args.data, args.workers)
+    elapsed = time.perf_counter() - start
+    write_results(summaries, args.out)
+
+    runs = sum(summary['cases'] for summary in summaries)
+    print(f"{runs} backtests in {elapsed:.1f}s ({runs / elapsed * 60:.0f} cases/min), results in {args.out}")
+    for rank, summary in enumerate(summaries[:5], 1):
+        print(rank, summary)
+
+
+if __name__ == '__main__':
+    main()